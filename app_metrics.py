@@ -0,0 +1,191 @@
+"""Opt-in timing instrumentation shared by the Streamlit apps.
+
+Set APP_METRICS=1 before starting an app to record how long each rerun and
+each instrumented function takes. When it is unset, instrumented() hands
+back the original function, so there is no overhead at all.
+
+Latencies go into fixed-bucket histograms held in memory for the life of
+the process. They can be exported as JSON or as Prometheus text, and
+render_sidebar() shows them in a debug panel.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+ENABLED = os.environ.get("APP_METRICS", "").lower() in ("1", "true", "yes", "on")
+
+# Upper bounds in seconds, 100 us to 10 s; anything slower lands in +Inf
+BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    """Call count, total time and bucketed latencies of one operation"""
+
+    __slots__ = ("count", "total", "errors", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def percentile(self, percent):
+        """Upper bound of the bucket holding the given percentile.
+
+        None means the percentile falls beyond the largest bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank = self.count * percent / 100
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+
+class MetricsRegistry:
+    """Thread-safe store of one histogram per operation name"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, error=False):
+        bucket = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.count += 1
+            histogram.total += seconds
+            histogram.buckets[bucket] += 1
+            if error:
+                histogram.errors += 1
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.started_at = time.time()
+
+    def snapshot(self):
+        """Plain-dict copy of every histogram, summary percentiles included"""
+        with self._lock:
+            histograms = {
+                name: (h.count, h.total, h.errors, list(h.buckets), h.percentile(50), h.percentile(95), h.percentile(99))
+                for name, h in self.histograms.items()
+            }
+        report = {}
+        for name, (count, total, errors, buckets, p50, p95, p99) in sorted(histograms.items()):
+            report[name] = {
+                "count": count,
+                "errors": errors,
+                "total_seconds": total,
+                "mean_seconds": total / count if count else 0.0,
+                "p50_seconds": p50,
+                "p95_seconds": p95,
+                "p99_seconds": p99,
+                "buckets": dict(zip([str(bound) for bound in BUCKETS] + ["+Inf"], buckets)),
+            }
+        return report
+
+    def to_json(self):
+        return json.dumps({"started_at": self.started_at, "operations": self.snapshot()}, indent=2)
+
+    def to_prometheus(self, metric="app_operation_seconds"):
+        """Prometheus text exposition with cumulative le buckets"""
+        lines = [
+            f"# HELP {metric} Latency of instrumented app operations.",
+            f"# TYPE {metric} histogram",
+        ]
+        snapshot = self.snapshot()
+        for name, stats in snapshot.items():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound, count in stats["buckets"].items():
+                cumulative += count
+                lines.append(f'{metric}_bucket{{operation="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{operation="{label}"}} {stats["total_seconds"]}')
+            lines.append(f'{metric}_count{{operation="{label}"}} {stats["count"]}')
+        lines.append(f"# HELP {metric}_errors_total Instrumented operations that raised.")
+        lines.append(f"# TYPE {metric}_errors_total counter")
+        for name, stats in snapshot.items():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{metric}_errors_total{{operation="{label}"}} {stats["errors"]}')
+        return "\n".join(lines) + "\n"
+
+
+# One registry per process, shared by every session and rerun
+REGISTRY = MetricsRegistry()
+
+
+def instrumented(name):
+    """Decorator timing every call under name while metrics are enabled"""
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            error = False
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                REGISTRY.observe(name, time.perf_counter() - started, error)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def rerun_timer(app):
+    """Time one whole script run of app while metrics are enabled"""
+    if not ENABLED:
+        yield
+        return
+    # st.rerun() and st.stop() end a run by raising; that is still a full run
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(f"{app}.rerun", time.perf_counter() - started)
+
+
+def render_sidebar(st):
+    """Debug panel with the current metrics; does nothing when disabled"""
+    if not ENABLED:
+        return
+    with st.sidebar.expander("⏱️ Performance metrics"):
+        snapshot = REGISTRY.snapshot()
+        if not snapshot:
+            st.write("Nothing recorded yet.")
+        for name, stats in snapshot.items():
+            st.write(
+                f"**{name}**: {stats['count']} calls, "
+                f"mean {stats['mean_seconds'] * 1000:.2f} ms, "
+                f"p95 {_bound_ms(stats['p95_seconds'])}, "
+                f"p99 {_bound_ms(stats['p99_seconds'])}"
+                + (f", {stats['errors']} errors" if stats['errors'] else "")
+            )
+        st.download_button("JSON", REGISTRY.to_json(), file_name="metrics.json", mime="application/json")
+        st.download_button("Prometheus", REGISTRY.to_prometheus(), file_name="metrics.prom", mime="text/plain")
+        if st.button("Reset metrics"):
+            REGISTRY.reset()
+
+
+def _bound_ms(seconds):
+    if seconds is None:
+        return f"> {BUCKETS[-1] * 1000:g} ms"
+    return f"≤ {seconds * 1000:g} ms"
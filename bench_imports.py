@@ -0,0 +1,60 @@
+"""Import-time benchmark for the headless app cores.
+
+Each core is imported in a fresh interpreter, the way a batch worker
+starts, and must load well under the budget without pulling in any UI
+or dataframe library.
+
+Run with: python bench_imports.py [repeats] [budget_ms]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CORES = ["calculator_core", "chess_core", "chase_core", "shop_cart", "shop_service"]
+HEAVY_MODULES = ["streamlit", "pandas", "numpy", "pyarrow"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+elapsed = time.perf_counter() - started
+print(json.dumps([elapsed, sorted(m for m in {heavy!r} if m in sys.modules)]))
+"""
+
+
+def measure(modules, repeats):
+    """Import times in seconds over repeats fresh interpreters, plus any heavy imports seen"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = PROBE.format(heavy=HEAVY_MODULES)
+    times, heavy = [], set()
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", code, *modules],
+            cwd=here, capture_output=True, text=True, check=True
+        ).stdout
+        elapsed, loaded = json.loads(output)
+        times.append(elapsed)
+        heavy.update(loaded)
+    return times, sorted(heavy)
+
+
+def run(repeats=5, budget_ms=100):
+    ok = True
+    print(f"{'module':<20}{'best ms':>10}{'median ms':>12}  heavy imports")
+    for label, modules in [(name, [name]) for name in CORES] + [("all cores", CORES)]:
+        times, heavy = measure(modules, repeats)
+        median_ms = statistics.median(times) * 1000
+        print(f"{label:<20}{min(times) * 1000:>10.1f}{median_ms:>12.1f}  {', '.join(heavy) or '-'}")
+        if median_ms > budget_ms or heavy:
+            ok = False
+    print(f"budget: {budget_ms} ms, {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 100
+    sys.exit(0 if run(repeats, budget_ms) else 1)
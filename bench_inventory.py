@@ -0,0 +1,56 @@
+"""Throughput benchmark for simultaneous checkouts of one hot product.
+
+Run with: python bench_inventory.py [threads] [stock]
+"""
+import sys
+import threading
+import time
+
+from shop_inventory import Inventory, OutOfStockError
+
+
+def run(threads=32, stock=100000, quantity=1):
+    inventory = Inventory()
+    hot = {"id": 1, "stock": stock}
+    cold = {"id": 2, "stock": stock * threads}
+    inventory.track(hot)
+    inventory.track(cold)
+    sold = [0] * threads
+    rejected = [0] * threads
+    start_gate = threading.Barrier(threads + 1)
+
+    def shopper(n):
+        start_gate.wait()
+        while True:
+            try:
+                reservation = inventory.reserve([(1, quantity), (2, 1)])
+            except OutOfStockError:
+                rejected[n] += 1
+                return
+            inventory.commit(reservation)
+            sold[n] += quantity
+
+    workers = [threading.Thread(target=shopper, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    start_gate.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    total_sold = sum(sold)
+    print(f"threads:        {threads}")
+    print(f"hot stock:      {stock}")
+    print(f"units sold:     {total_sold}")
+    print(f"stock left:     {inventory.stock(1)}")
+    print(f"oversold:       {total_sold > stock}")
+    print(f"elapsed:        {elapsed:.3f} s")
+    print(f"checkouts/sec:  {total_sold / quantity / elapsed:,.0f}")
+    return total_sold == stock and inventory.stock(1) == 0
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    stock = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    sys.exit(0 if run(threads, stock) else 1)
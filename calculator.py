@@ -1,26 +1,6 @@
 import streamlit as st
-import math
-
-def calculate(num1, num2, operation):
-    """Perform basic arithmetic operations"""
-    if operation == "Add":
-        return num1 + num2
-    elif operation == "Subtract":
-        return num1 - num2
-    elif operation == "Multiply":
-        return num1 * num2
-    elif operation == "Divide":
-        if num2 == 0:
-            return "Error: Division by zero"
-        return num1 / num2
-    elif operation == "Power":
-        return num1 ** num2
-    elif operation == "Square Root":
-        if num1 < 0:
-            return "Error: Cannot calculate square root of negative number"
-        return math.sqrt(num1)
-    else:
-        return "Invalid operation"
+from app_metrics import render_sidebar, rerun_timer
+from calculator_core import calculate
 
 def main():
     st.set_page_config(
@@ -117,6 +97,9 @@ def main():
             st.rerun()
     else:
         st.write("No calculations in history yet.")
+    
+    render_sidebar(st)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    with rerun_timer("calculator"):
+        main() 
\ No newline at end of file
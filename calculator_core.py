@@ -0,0 +1,27 @@
+"""Calculator arithmetic, free of any UI"""
+import math
+
+from app_metrics import instrumented
+
+
+@instrumented("calculator.calculate")
+def calculate(num1, num2, operation):
+    """Perform basic arithmetic operations"""
+    if operation == "Add":
+        return num1 + num2
+    elif operation == "Subtract":
+        return num1 - num2
+    elif operation == "Multiply":
+        return num1 * num2
+    elif operation == "Divide":
+        if num2 == 0:
+            return "Error: Division by zero"
+        return num1 / num2
+    elif operation == "Power":
+        return num1 ** num2
+    elif operation == "Square Root":
+        if num1 < 0:
+            return "Error: Cannot calculate square root of negative number"
+        return math.sqrt(num1)
+    else:
+        return "Invalid operation"
@@ -0,0 +1,84 @@
+import os
+import sys
+import threading
+from array import array
+
+from chess_core import MoveHistory
+
+
+class GameArchive:
+    """Append-only store of finished games in two flat binary files.
+
+    moves.bin holds every game's 16-bit moves back to back and index.bin
+    the 64-bit end offset of each game in moves.bin, both little-endian.
+    Loading reads the two files straight into arrays with no per-game
+    parsing, so a million games of 80 plies cost about 168 MB on disk and
+    in memory.
+    """
+
+    def __init__(self, directory="chess_games"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.moves_path = os.path.join(directory, "moves.bin")
+        self.index_path = os.path.join(directory, "index.bin")
+        self.moves = _read_array('H', self.moves_path)
+        self.ends = _read_array('Q', self.index_path)
+        self._lock = threading.Lock()
+        # Drop a torn index entry and moves whose append never reached the index
+        end = self.ends[-1] if self.ends else 0
+        del self.moves[end:]
+        _truncate(self.index_path, len(self.ends) * self.ends.itemsize)
+        _truncate(self.moves_path, end * self.moves.itemsize)
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __iter__(self):
+        for number in range(len(self.ends)):
+            yield self.game(number)
+
+    def game(self, number):
+        """MoveHistory of the game with the given number, oldest first"""
+        start = self.ends[number - 1] if number else 0
+        return MoveHistory(self.moves[start:self.ends[number]])
+
+    def append(self, history):
+        """Store the played moves of history and return the game number"""
+        data = history.to_bytes()
+        with self._lock:
+            end = (self.ends[-1] if self.ends else 0) + len(history)
+            # Moves first: a crash in between leaves only unindexed moves
+            with open(self.moves_path, 'ab') as f:
+                f.write(data)
+            with open(self.index_path, 'ab') as f:
+                f.write(_to_bytes(array('Q', [end])))
+            self.moves.extend(history)
+            self.ends.append(end)
+            return len(self.ends) - 1
+
+
+def _read_array(typecode, path):
+    values = array(typecode)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return values
+    # Ignore a torn trailing item
+    values.frombytes(data[:len(data) - len(data) % values.itemsize])
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _truncate(path, size):
+    if os.path.exists(path) and os.path.getsize(path) > size:
+        with open(path, 'r+b') as f:
+            f.truncate(size)
+
+
+def _to_bytes(values):
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
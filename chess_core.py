@@ -0,0 +1,247 @@
+"""Chess board representation and move generation, free of any UI.
+
+Boards are 8x8 lists of piece letters: uppercase for white, lowercase
+for black and '.' for an empty square. Positions are (row, col) tuples
+with row 0 at black's side.
+
+Moves are packed into 16-bit integers: bits 0-5 hold the from square,
+bits 6-11 the to square (row * 8 + col) and bits 12-14 the kind of piece
+captured, so a whole game is an array of unsigned shorts.
+"""
+import copy
+import sys
+from array import array
+
+from app_metrics import instrumented
+
+# Initial board setup
+START_BOARD = [
+    list('rnbqkbnr'),
+    list('pppppppp'),
+    list('........'),
+    list('........'),
+    list('........'),
+    list('........'),
+    list('PPPPPPPP'),
+    list('RNBQKBNR'),
+]
+
+# Helper functions for chess logic
+
+def is_white(piece):
+    return piece.isupper()
+
+def is_black(piece):
+    return piece.islower()
+
+def get_piece(board, pos):
+    row, col = pos
+    return board[row][col]
+
+def set_piece(board, pos, piece):
+    row, col = pos
+    board[row][col] = piece
+
+def in_bounds(pos):
+    row, col = pos
+    return 0 <= row < 8 and 0 <= col < 8
+
+@instrumented("chess.get_moves")
+def get_moves(board, pos):
+    # Returns a list of legal moves for the piece at pos
+    piece = get_piece(board, pos)
+    moves = []
+    if piece == '.':
+        return moves
+    directions = []
+    row, col = pos
+    if piece.lower() == 'p':
+        # Pawn moves
+        dir = -1 if is_white(piece) else 1
+        start_row = 6 if is_white(piece) else 1
+        # Forward
+        next_row = row + dir
+        if in_bounds((next_row, col)) and get_piece(board, (next_row, col)) == '.':
+            moves.append((next_row, col))
+            # Double move from start
+            if row == start_row:
+                next_row2 = row + 2*dir
+                if in_bounds((next_row2, col)) and get_piece(board, (next_row2, col)) == '.':
+                    moves.append((next_row2, col))
+        # Captures
+        for dc in [-1, 1]:
+            next_col = col + dc
+            if in_bounds((next_row, next_col)):
+                target = get_piece(board, (next_row, next_col))
+                if target != '.' and is_white(piece) != is_white(target):
+                    moves.append((next_row, next_col))
+    elif piece.lower() == 'n':
+        # Knight moves
+        for dr, dc in [(-2,-1), (-2,1), (-1,-2), (-1,2), (1,-2), (1,2), (2,-1), (2,1)]:
+            nr, nc = row+dr, col+dc
+            if in_bounds((nr, nc)):
+                target = get_piece(board, (nr, nc))
+                if target == '.' or is_white(piece) != is_white(target):
+                    moves.append((nr, nc))
+    elif piece.lower() == 'b':
+        # Bishop moves
+        for dr, dc in [(-1,-1), (-1,1), (1,-1), (1,1)]:
+            for i in range(1,8):
+                nr, nc = row+dr*i, col+dc*i
+                if not in_bounds((nr, nc)):
+                    break
+                target = get_piece(board, (nr, nc))
+                if target == '.':
+                    moves.append((nr, nc))
+                elif is_white(piece) != is_white(target):
+                    moves.append((nr, nc))
+                    break
+                else:
+                    break
+    elif piece.lower() == 'r':
+        # Rook moves
+        for dr, dc in [(-1,0), (1,0), (0,-1), (0,1)]:
+            for i in range(1,8):
+                nr, nc = row+dr*i, col+dc*i
+                if not in_bounds((nr, nc)):
+                    break
+                target = get_piece(board, (nr, nc))
+                if target == '.':
+                    moves.append((nr, nc))
+                elif is_white(piece) != is_white(target):
+                    moves.append((nr, nc))
+                    break
+                else:
+                    break
+    elif piece.lower() == 'q':
+        # Queen moves
+        for dr, dc in [(-1,-1), (-1,1), (1,-1), (1,1), (-1,0), (1,0), (0,-1), (0,1)]:
+            for i in range(1,8):
+                nr, nc = row+dr*i, col+dc*i
+                if not in_bounds((nr, nc)):
+                    break
+                target = get_piece(board, (nr, nc))
+                if target == '.':
+                    moves.append((nr, nc))
+                elif is_white(piece) != is_white(target):
+                    moves.append((nr, nc))
+                    break
+                else:
+                    break
+    elif piece.lower() == 'k':
+        # King moves
+        for dr in [-1,0,1]:
+            for dc in [-1,0,1]:
+                if dr == 0 and dc == 0:
+                    continue
+                nr, nc = row+dr, col+dc
+                if in_bounds((nr, nc)):
+                    target = get_piece(board, (nr, nc))
+                    if target == '.' or is_white(piece) != is_white(target):
+                        moves.append((nr, nc))
+    return moves
+
+# Move encoding
+
+CAPTURE_KINDS = ".pnbrqk"   # index stored in the capture bits; 0 means nothing captured
+SQUARE_MASK = 0x3F
+CAPTURE_SHIFT = 12
+
+def encode_move(from_pos, to_pos, captured='.'):
+    from_row, from_col = from_pos
+    to_row, to_col = to_pos
+    return ((from_row * 8 + from_col)
+            | (to_row * 8 + to_col) << 6
+            | CAPTURE_KINDS.index(captured.lower()) << CAPTURE_SHIFT)
+
+def decode_move(move):
+    """Return (from_pos, to_pos, captured kind) for an encoded move"""
+    from_square = move & SQUARE_MASK
+    to_square = move >> 6 & SQUARE_MASK
+    return divmod(from_square, 8), divmod(to_square, 8), CAPTURE_KINDS[move >> CAPTURE_SHIFT & 7]
+
+def make_move(board, from_pos, to_pos):
+    """Move the piece on from_pos to to_pos and return the encoded move"""
+    move = encode_move(from_pos, to_pos, get_piece(board, to_pos))
+    apply_move(board, move)
+    return move
+
+def apply_move(board, move):
+    from_pos, to_pos, _ = decode_move(move)
+    set_piece(board, to_pos, get_piece(board, from_pos))
+    set_piece(board, from_pos, '.')
+
+def undo_move(board, move):
+    from_pos, to_pos, captured = decode_move(move)
+    piece = get_piece(board, to_pos)
+    set_piece(board, from_pos, piece)
+    # The captured piece always belongs to the other side
+    set_piece(board, to_pos, captured.upper() if is_black(piece) else captured)
+
+
+class MoveHistory:
+    """Packed list of played moves with a cursor for undo and redo.
+
+    Moves past the cursor are kept for redo until a new move is pushed.
+    """
+
+    __slots__ = ("moves", "ply")
+
+    def __init__(self, moves=()):
+        self.moves = array('H', moves)
+        self.ply = len(self.moves)
+
+    def __len__(self):
+        return self.ply
+
+    def __iter__(self):
+        return iter(self.moves[:self.ply])
+
+    def push(self, move):
+        del self.moves[self.ply:]
+        self.moves.append(move)
+        self.ply += 1
+
+    def undo(self, board):
+        """Take back the last move on board; return it, or None at the start"""
+        if not self.ply:
+            return None
+        self.ply -= 1
+        move = self.moves[self.ply]
+        undo_move(board, move)
+        return move
+
+    def redo(self, board):
+        """Replay the last undone move on board; return it, or None"""
+        if self.ply == len(self.moves):
+            return None
+        move = self.moves[self.ply]
+        apply_move(board, move)
+        self.ply += 1
+        return move
+
+    @property
+    def white_to_move(self):
+        return self.ply % 2 == 0
+
+    def board(self):
+        """Position after the played moves"""
+        board = copy.deepcopy(START_BOARD)
+        for move in self:
+            apply_move(board, move)
+        return board
+
+    def to_bytes(self):
+        """Played moves as little-endian 16-bit integers"""
+        moves = self.moves[:self.ply]
+        if sys.byteorder != "little":
+            moves.byteswap()
+        return moves.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        moves = array('H')
+        moves.frombytes(data)
+        if sys.byteorder != "little":
+            moves.byteswap()
+        return cls(moves)
@@ -1,25 +1,11 @@
 import streamlit as st
-import pandas as pd
-import json
 import os
-from datetime import datetime
-import uuid
-
-# Page configuration
-st.set_page_config(
-    page_title="Online Shopping App",
-    page_icon="🛒",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Initialize session state
-if 'cart' not in st.session_state:
-    st.session_state.cart = []
-if 'user' not in st.session_state:
-    st.session_state.user = None
-if 'orders' not in st.session_state:
-    st.session_state.orders = []
+from shop_cart import Cart
+from shop_catalog import page_count
+from shop_inventory import OutOfStockError
+from shop_orders import FINAL_STATUSES
+from shop_service import Shop
+from app_metrics import render_sidebar, rerun_timer
 
 # Sample product data
 def load_products():
@@ -107,83 +93,76 @@ def load_products():
     ]
     return products
 
+@st.cache_resource
+def get_shop():
+    """Build the catalog, stores and indexes once and share them across sessions"""
+    return Shop(load_products())
+
+def find_products(query, category, min_price, max_price, min_rating, start, limit):
+    return get_shop().find_products(query, category, min_price, max_price, min_rating, start, limit)
+
 # User authentication functions
 def register_user(username, email, password):
-    users = load_users()
-    if username in [user['username'] for user in users]:
-        return False, "Username already exists"
-    
-    new_user = {
-        "username": username,
-        "email": email,
-        "password": password,  # In real app, hash the password
-        "created_at": datetime.now().isoformat()
-    }
-    users.append(new_user)
-    save_users(users)
-    return True, "Registration successful"
+    return get_shop().register_user(username, email, password)
 
 def login_user(username, password):
-    users = load_users()
-    for user in users:
-        if user['username'] == username and user['password'] == password:
-            return True, user
-    return False, "Invalid credentials"
-
-def load_users():
-    try:
-        with open('users.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
-
-def save_users(users):
-    with open('users.json', 'w') as f:
-        json.dump(users, f, indent=2)
+    return get_shop().login_user(username, password)
 
 # Cart functions
 def add_to_cart(product, quantity=1):
-    for item in st.session_state.cart:
-        if item['product']['id'] == product['id']:
-            item['quantity'] += quantity
-            return
-    st.session_state.cart.append({'product': product, 'quantity': quantity})
+    st.session_state.cart.add(product, quantity)
 
 def remove_from_cart(product_id):
-    st.session_state.cart = [item for item in st.session_state.cart if item['product']['id'] != product_id]
+    st.session_state.cart.remove(product_id)
+
+def update_cart_quantity(product_id, quantity):
+    st.session_state.cart.update_quantity(product_id, quantity)
 
 def get_cart_total():
-    return sum(item['product']['price'] * item['quantity'] for item in st.session_state.cart)
+    return st.session_state.cart.subtotal
 
 def get_cart_count():
-    return sum(item['quantity'] for item in st.session_state.cart)
+    return st.session_state.cart.count
+
+# Import rights are a flag on the user row: python shop_users.py <username>
+def is_admin():
+    user = st.session_state.user
+    return user is not None and user.get('is_admin', False)
 
 # Order functions
+ORDERS_PER_PAGE = 10
+
 def create_order(user, cart_items, shipping_address):
-    order = {
-        "id": str(uuid.uuid4()),
-        "user": user,
-        "items": cart_items,
-        "total": get_cart_total(),
-        "shipping_address": shipping_address,
-        "status": "Pending",
-        "created_at": datetime.now().isoformat()
-    }
-    st.session_state.orders.append(order)
-    st.session_state.cart = []
+    order = get_shop().create_order(user, cart_items, shipping_address)
+    st.session_state.cart = Cart()
+    st.session_state.last_order_id = order.id
     return order
 
 # Main application
 def main():
+    # Page configuration
+    st.set_page_config(
+        page_title="Online Shopping App",
+        page_icon="🛒",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    
+    # Initialize session state
+    if 'cart' not in st.session_state:
+        st.session_state.cart = Cart()
+    if 'user' not in st.session_state:
+        st.session_state.user = None
+    
     st.title("🛒 Online Shopping App")
     
     # Sidebar for navigation and user actions
     with st.sidebar:
         st.header("Navigation")
-        page = st.selectbox(
-            "Choose a page",
-            ["Home", "Products", "Cart", "Orders", "Account"]
-        )
+        pages = ["Home", "Products", "Cart", "Orders", "Account", "Analytics"]
+        if is_admin():
+            pages.append("Import")
+        page = st.selectbox("Choose a page", pages)
         
         # User authentication section
         st.header("Account")
@@ -221,6 +200,14 @@ def main():
             if st.button("Logout"):
                 st.session_state.user = None
                 st.rerun()
+            
+            # Latest order status, a dict lookup in the order pipeline
+            last_order_id = st.session_state.get('last_order_id')
+            status = get_shop().order_status(last_order_id) if last_order_id else None
+            if status:
+                st.write(f"Last order {last_order_id.hex()[:8]}: **{status}**")
+                if status not in FINAL_STATUSES and st.button("Refresh status"):
+                    st.rerun()
         
         # Cart summary
         if st.session_state.cart:
@@ -239,6 +226,12 @@ def main():
         show_orders_page()
     elif page == "Account":
         show_account_page()
+    elif page == "Analytics":
+        show_analytics_page()
+    elif page == "Import":
+        show_import_page()
+    
+    render_sidebar(st)
 
 def show_home_page():
     st.header("Welcome to Our Online Store! 🛍️")
@@ -264,12 +257,11 @@ def show_home_page():
     
     with col2:
         st.markdown("### Quick Stats")
-        products = load_products()
-        categories = set(product['category'] for product in products)
+        catalog = get_shop().catalog
         
-        st.metric("Total Products", len(products))
-        st.metric("Categories", len(categories))
-        st.metric("Avg Rating", "4.5 ⭐")
+        st.metric("Total Products", len(catalog))
+        st.metric("Categories", len(catalog.by_category))
+        st.metric("Avg Rating", f"{catalog.average_rating():.1f} ⭐")
         
         if st.session_state.cart:
             st.metric("Cart Items", get_cart_count())
@@ -278,13 +270,22 @@ def show_home_page():
 def show_products_page():
     st.header("🛍️ Product Catalog")
     
-    products = load_products()
+    shop = get_shop()
+    catalog = shop.catalog
+    search_index = shop.search_index
+    recommender = shop.recommender
+    
+    # Search
+    query = st.text_input("Search products", placeholder="Try 'wireless' or 'yoga'")
+    suggestions = search_index.suggest(query)
+    if suggestions and query.strip().lower() not in suggestions:
+        st.caption("Did you mean: " + ", ".join(suggestions))
     
     # Filters
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        categories = ["All"] + list(set(product['category'] for product in products))
+        categories = ["All"] + catalog.categories()
         selected_category = st.selectbox("Category", categories)
     
     with col2:
@@ -294,12 +295,31 @@ def show_products_page():
         min_rating = st.slider("Minimum Rating", 0.0, 5.0, 0.0, 0.1)
     
     # Filter products
-    filtered_products = products
-    if selected_category != "All":
-        filtered_products = [p for p in filtered_products if p['category'] == selected_category]
+    filter_key = (query.strip(), selected_category, price_range[0], price_range[1], min_rating)
     
-    filtered_products = [p for p in filtered_products if price_range[0] <= p['price'] <= price_range[1]]
-    filtered_products = [p for p in filtered_products if p['rating'] >= min_rating]
+    # Only the visible slice of the results is fetched and rendered
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        per_page = st.selectbox("Per page", [8, 12, 24, 48], index=1)
+    with col2:
+        browse_mode = st.radio("Browse", ["Pages", "Scroll"], horizontal=True)
+    
+    if browse_mode == "Pages":
+        page = st.number_input("Page", min_value=1, value=1)
+        total, visible_ids = find_products(*filter_key, (page - 1) * per_page, per_page)
+        total_pages = page_count(total, per_page)
+        if page > total_pages:
+            page = total_pages
+            total, visible_ids = find_products(*filter_key, (page - 1) * per_page, per_page)
+        st.caption(f"{total} products - page {page} of {total_pages}")
+    else:
+        if st.session_state.get('scroll_key') != filter_key:
+            st.session_state.scroll_key = filter_key
+            st.session_state.scroll_count = per_page
+        total, visible_ids = find_products(*filter_key, 0, st.session_state.scroll_count)
+        st.caption(f"Showing {len(visible_ids)} of {total} products")
+    
+    filtered_products = [catalog.get(product_id) for product_id in visible_ids]
     
     # Display products in a grid
     cols = st.columns(4)
@@ -311,17 +331,29 @@ def show_products_page():
             st.write(f"Category: {product['category']}")
             st.write(product['description'][:50] + "...")
             st.write(f"Stock: {product['stock']} units")
+            bought_with = [catalog.get(pid) for pid in recommender.recommend(product['id'], 2)]
+            bought_with = [p['name'] for p in bought_with if p]
+            if bought_with:
+                st.caption("Often bought with: " + ", ".join(bought_with))
             
-            col1, col2 = st.columns(2)
-            with col1:
-                quantity = st.number_input("Qty", min_value=1, max_value=product['stock'], value=1, key=f"qty_{product['id']}")
-            with col2:
-                if st.button("Add to Cart", key=f"add_{product['id']}"):
-                    add_to_cart(product, quantity)
-                    st.success(f"Added {quantity} {product['name']} to cart!")
+            if product['stock'] < 1:
+                st.warning("Out of stock")
+            else:
+                col1, col2 = st.columns(2)
+                with col1:
+                    quantity = st.number_input("Qty", min_value=1, max_value=product['stock'], value=1, key=f"qty_{product['id']}")
+                with col2:
+                    if st.button("Add to Cart", key=f"add_{product['id']}"):
+                        add_to_cart(product, quantity)
+                        st.success(f"Added {quantity} {product['name']} to cart!")
         
         if (i + 1) % 4 == 0:
             st.markdown("---")
+    
+    if browse_mode == "Scroll" and len(visible_ids) < total:
+        if st.button("Load more"):
+            st.session_state.scroll_count += per_page
+            st.rerun()
 
 def show_cart_page():
     st.header("🛒 Shopping Cart")
@@ -331,7 +363,7 @@ def show_cart_page():
         return
     
     # Display cart items
-    for i, item in enumerate(st.session_state.cart):
+    for item in list(st.session_state.cart):
         col1, col2, col3, col4, col5 = st.columns([1, 3, 1, 1, 1])
         
         with col1:
@@ -339,19 +371,41 @@ def show_cart_page():
         
         with col2:
             st.write(f"**{item['product']['name']}**")
-            st.write(f"Price: ${item['product']['price']:.2f}")
+            st.write(f"Price: ${item['unit_cents'] / 100:.2f}")
         
         with col3:
-            st.write(f"Qty: {item['quantity']}")
+            quantity = st.number_input(
+                "Qty", min_value=1, max_value=max(item['product']['stock'], item['quantity']),
+                value=item['quantity'], key=f"cart_qty_{item['product']['id']}"
+            )
+            if quantity != item['quantity']:
+                update_cart_quantity(item['product']['id'], quantity)
+                st.rerun()
         
         with col4:
-            st.write(f"${item['product']['price'] * item['quantity']:.2f}")
+            st.write(f"${item['unit_cents'] * item['quantity'] / 100:.2f}")
         
         with col5:
-            if st.button("Remove", key=f"remove_{i}"):
+            if st.button("Remove", key=f"remove_{item['product']['id']}"):
                 remove_from_cart(item['product']['id'])
                 st.rerun()
     
+    # Recommendations
+    cart_ids = [item['product']['id'] for item in st.session_state.cart]
+    shop = get_shop()
+    suggestions = [shop.catalog.get(pid) for pid in shop.recommender.recommend_for(cart_ids, 4)]
+    suggestions = [product for product in suggestions if product and product['stock'] > 0]
+    if suggestions:
+        st.subheader("Frequently Bought Together")
+        cols = st.columns(4)
+        for col, product in zip(cols, suggestions):
+            with col:
+                st.write(f"{product['image']} **{product['name']}**")
+                st.write(f"${product['price']:.2f}")
+                if st.button("Add", key=f"rec_{product['id']}"):
+                    add_to_cart(product)
+                    st.rerun()
+    
     st.markdown("---")
     
     # Cart summary and checkout
@@ -359,11 +413,12 @@ def show_cart_page():
     
     with col1:
         st.subheader("Cart Summary")
+        subtotal = get_cart_total()
         st.write(f"Total Items: {get_cart_count()}")
-        st.write(f"Subtotal: ${get_cart_total():.2f}")
-        shipping = 0 if get_cart_total() > 50 else 5.99
+        st.write(f"Subtotal: ${subtotal:.2f}")
+        shipping = 0 if subtotal > 50 else 5.99
         st.write(f"Shipping: ${shipping:.2f}")
-        st.write(f"**Total: ${get_cart_total() + shipping:.2f}**")
+        st.write(f"**Total: ${subtotal + shipping:.2f}**")
     
     with col2:
         st.subheader("Checkout")
@@ -373,9 +428,15 @@ def show_cart_page():
             shipping_address = st.text_area("Shipping Address", height=100)
             if st.button("Place Order"):
                 if shipping_address.strip():
-                    order = create_order(st.session_state.user, st.session_state.cart, shipping_address)
-                    st.success(f"Order placed successfully! Order ID: {order['id']}")
-                    st.rerun()
+                    try:
+                        order = create_order(st.session_state.user, st.session_state.cart, shipping_address)
+                    except OutOfStockError as e:
+                        product = shop.catalog.get(e.product_id)
+                        name = product['name'] if product else f"Product #{e.product_id}"
+                        st.error(f"Sorry, only {e.available} of {name} left in stock")
+                    else:
+                        st.success(f"Order placed successfully! Order ID: {order.id_text}")
+                        st.rerun()
                 else:
                     st.error("Please enter a shipping address")
 
@@ -386,22 +447,39 @@ def show_orders_page():
         st.warning("Please login to view orders")
         return
     
-    user_orders = [order for order in st.session_state.orders if order['user']['username'] == st.session_state.user['username']]
+    shop = get_shop()
+    catalog = shop.catalog
+    username = st.session_state.user['username']
+    order_count = shop.orders.user_order_count(username)
     
-    if not user_orders:
+    last_order_id = st.session_state.get('last_order_id')
+    status = shop.order_status(last_order_id) if last_order_id else None
+    if status and status not in FINAL_STATUSES:
+        st.info(f"Order {last_order_id.hex()[:8]} is {status.lower()} and will appear here shortly.")
+        if st.button("Refresh"):
+            st.rerun()
+    
+    if not order_count:
         st.info("No orders found. Start shopping!")
         return
     
-    for order in user_orders:
-        with st.expander(f"Order {order['id'][:8]} - {order['status']} - ${order['total']:.2f}"):
-            st.write(f"**Date:** {order['created_at'][:10]}")
-            st.write(f"**Status:** {order['status']}")
-            st.write(f"**Total:** ${order['total']:.2f}")
-            st.write(f"**Shipping Address:** {order['shipping_address']}")
+    total_pages = page_count(order_count, ORDERS_PER_PAGE)
+    page = 1
+    if total_pages > 1:
+        page = st.number_input("Page", min_value=1, max_value=total_pages, value=1)
+    
+    for order in shop.user_orders_page(username, page, ORDERS_PER_PAGE):
+        with st.expander(f"Order {order.id_text[:8]} - {order.status} - ${order.total:.2f}"):
+            st.write(f"**Date:** {order.day}")
+            st.write(f"**Status:** {order.status}")
+            st.write(f"**Total:** ${order.total:.2f}")
+            st.write(f"**Shipping Address:** {order.shipping_address}")
             
             st.subheader("Items:")
-            for item in order['items']:
-                st.write(f"- {item['product']['name']} x{item['quantity']} = ${item['product']['price'] * item['quantity']:.2f}")
+            for product_id, quantity, unit_price in order.lines():
+                product = catalog.get(product_id)
+                name = product['name'] if product else f"Product #{product_id}"
+                st.write(f"- {name} x{quantity} = ${unit_price * quantity:.2f}")
 
 def show_account_page():
     st.header("👤 Account Settings")
@@ -420,12 +498,88 @@ def show_account_page():
     
     with col2:
         st.subheader("Account Statistics")
-        user_orders = [order for order in st.session_state.orders if order['user']['username'] == st.session_state.user['username']]
-        total_spent = sum(order['total'] for order in user_orders)
+        order_count, total_spent = get_shop().orders.user_stats(st.session_state.user['username'])
         
-        st.metric("Total Orders", len(user_orders))
+        st.metric("Total Orders", order_count)
         st.metric("Total Spent", f"${total_spent:.2f}")
         st.metric("Current Cart Items", get_cart_count())
 
+def show_analytics_page():
+    import pandas as pd
+    
+    st.header("📈 Sales Analytics")
+    
+    shop = get_shop()
+    analytics = shop.analytics
+    catalog = shop.catalog
+    
+    if not analytics.order_count:
+        st.info("No sales yet.")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Revenue", f"${analytics.revenue:,.2f}")
+    col2.metric("Orders", analytics.order_count)
+    col3.metric("Units Sold", analytics.units)
+    
+    st.subheader("Revenue by Day")
+    daily = pd.DataFrame(analytics.daily()).set_index("day")
+    st.line_chart(daily["revenue"])
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Units by Category")
+        st.bar_chart(pd.Series(analytics.category_units(), name="units"))
+    
+    with col2:
+        st.subheader("Top Sellers")
+        rows = []
+        for product_id, units, revenue in analytics.top_seller_rows():
+            product = catalog.get(product_id)
+            rows.append({
+                "Product": product['name'] if product else f"Product #{product_id}",
+                "Units": units,
+                "Revenue": f"${revenue:,.2f}",
+            })
+        st.dataframe(pd.DataFrame(rows), hide_index=True)
+    
+    with st.expander("Cache statistics"):
+        cache_stats = shop.cache.stats()
+        if cache_stats:
+            st.dataframe(pd.DataFrame(cache_stats).T)
+
+def show_import_page():
+    st.header("📥 Bulk Product Import")
+    if not is_admin():
+        st.error("Only shop administrators can import products")
+        return
+    st.write("Upload a CSV or JSON-lines feed with id, name, price, category, stock and rating columns. "
+             "Rows with an existing id replace that product. Imported products are saved and "
+             "reloaded when the shop restarts.")
+    
+    feed = st.file_uploader("Supplier feed", type=["csv", "jsonl", "ndjson"])
+    if feed is None or not st.button("Import"):
+        return
+    
+    progress_bar = st.progress(0.0)
+    status = st.empty()
+    
+    def report(progress):
+        if progress.fraction is not None:
+            progress_bar.progress(progress.fraction)
+        status.write(f"{progress.rows:,} rows read, {progress.imported:,} imported, {progress.rejected:,} rejected")
+    
+    try:
+        result = get_shop().import_products(feed, on_progress=report)
+    except ValueError as e:
+        st.error(f"Import failed: {e}")
+        return
+    progress_bar.progress(1.0)
+    st.success(f"Imported {result.imported:,} products")
+    for reason, count in sorted(result.reasons.items()):
+        st.warning(f"{count:,} rows rejected: {reason}")
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    with rerun_timer("shop"):
+        main()
\ No newline at end of file
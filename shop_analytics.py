@@ -0,0 +1,159 @@
+import bisect
+import threading
+from array import array
+
+TOP_SELLERS = 10
+
+
+class SalesAnalytics:
+    """Sales aggregates updated as each order is placed.
+
+    Daily figures are stored column by column in parallel arrays sorted by
+    day, category and product figures in dicts, and the best sellers in a
+    small list that is kept ordered as unit counts grow. Dashboards only
+    read these aggregates; the order log is read again only by
+    from_order_log().
+    """
+
+    def __init__(self, top_k=TOP_SELLERS):
+        self.top_k = top_k
+        self.order_count = 0
+        self.units = 0
+        self.revenue_cents = 0
+        self.units_by_category = {}
+        self.revenue_by_category = {}       # category -> cents
+        self.units_by_product = {}
+        self.revenue_by_product = {}        # product id -> cents
+        self.top_sellers = []               # product ids, most units first
+        # Daily columns
+        self.days = []
+        self.day_orders = array('q')
+        self.day_units = array('q')
+        self.day_revenue = array('q')       # cents
+        self._lock = threading.Lock()
+
+    @property
+    def revenue(self):
+        return self.revenue_cents / 100
+
+    def record(self, order, catalog):
+        """Fold one order into every aggregate"""
+        with self._lock:
+            day = self._day_slot(order.day)
+            self.order_count += 1
+            self.day_orders[day] += 1
+            for product_id, quantity, unit_price in order.lines():
+                cents = round(unit_price * 100) * quantity
+                product = catalog.get(product_id)
+                category = product['category'] if product else "Unknown"
+                self.units += quantity
+                self.revenue_cents += cents
+                self.day_units[day] += quantity
+                self.day_revenue[day] += cents
+                self.units_by_category[category] = self.units_by_category.get(category, 0) + quantity
+                self.revenue_by_category[category] = self.revenue_by_category.get(category, 0) + cents
+                self.units_by_product[product_id] = self.units_by_product.get(product_id, 0) + quantity
+                self.revenue_by_product[product_id] = self.revenue_by_product.get(product_id, 0) + cents
+                self._update_top(product_id)
+
+    def _day_slot(self, day):
+        # Orders arrive in time order, so this is almost always an append
+        if self.days and self.days[-1] == day:
+            return len(self.days) - 1
+        i = bisect.bisect_left(self.days, day)
+        if i < len(self.days) and self.days[i] == day:
+            return i
+        self.days.insert(i, day)
+        for column in (self.day_orders, self.day_units, self.day_revenue):
+            column.insert(i, 0)
+        return i
+
+    def _update_top(self, product_id):
+        # Unit counts only grow, so a product can only move up the list
+        top = self.top_sellers
+        units = self.units_by_product
+        if product_id not in top:
+            if len(top) >= self.top_k and units[product_id] <= units[top[-1]]:
+                return
+            top.append(product_id)
+        top.sort(key=lambda pid: -units[pid])
+        del top[self.top_k:]
+
+    # Readers take the lock and get copies, since the order pipeline
+    # records new orders from its own thread
+
+    def daily(self):
+        """Return the daily columns as a dict of lists, ready for a DataFrame"""
+        with self._lock:
+            return {
+                "day": list(self.days),
+                "orders": self.day_orders.tolist(),
+                "units": self.day_units.tolist(),
+                "revenue": [cents / 100 for cents in self.day_revenue],
+            }
+
+    def category_units(self):
+        with self._lock:
+            return dict(self.units_by_category)
+
+    def top_seller_rows(self):
+        """Return (product id, units, revenue) for each top seller, best first"""
+        with self._lock:
+            return [
+                (product_id, self.units_by_product[product_id], self.revenue_by_product[product_id] / 100)
+                for product_id in self.top_sellers
+            ]
+
+    @classmethod
+    def from_order_log(cls, order_log, catalog, top_k=TOP_SELLERS):
+        """Recompute every aggregate from the full order log with pandas"""
+        import pandas as pd
+
+        analytics = cls(top_k)
+        order_days, line_days, product_ids, quantities, unit_cents = [], [], [], [], []
+        for order in order_log:
+            if order.failed:
+                continue
+            day = order.day
+            order_days.append(day)
+            lines = order.line_table
+            product_ids.extend(lines[0::3])
+            quantities.extend(lines[1::3])
+            unit_cents.extend(lines[2::3])
+            line_days.extend([day] * (len(lines) // 3))
+        if not order_days:
+            return analytics
+
+        lines = pd.DataFrame({
+            "day": line_days,
+            "product_id": product_ids,
+            "units": quantities,
+            "revenue": pd.Series(quantities, dtype="int64") * pd.Series(unit_cents, dtype="int64"),
+        })
+        categories = {product['id']: product['category'] for product in catalog}
+        lines["category"] = lines["product_id"].map(categories).fillna("Unknown")
+
+        by_day = lines.groupby("day")[["units", "revenue"]].sum()
+        orders_by_day = pd.Series(order_days).value_counts()
+        by_day["orders"] = orders_by_day.reindex(by_day.index).fillna(0)
+        by_category = lines.groupby("category")[["units", "revenue"]].sum()
+        by_product = lines.groupby("product_id")[["units", "revenue"]].sum()
+
+        analytics.order_count = len(order_days)
+        analytics.units = int(lines["units"].sum())
+        analytics.revenue_cents = int(lines["revenue"].sum())
+        analytics.days = by_day.index.tolist()
+        analytics.day_orders = array('q', by_day["orders"].astype("int64").tolist())
+        analytics.day_units = array('q', by_day["units"].tolist())
+        analytics.day_revenue = array('q', by_day["revenue"].tolist())
+        analytics.units_by_category = _plain(by_category["units"])
+        analytics.revenue_by_category = _plain(by_category["revenue"])
+        analytics.units_by_product = _plain(by_product["units"])
+        analytics.revenue_by_product = _plain(by_product["revenue"])
+        analytics.top_sellers = by_product["units"].nlargest(top_k).index.tolist()
+        return analytics
+
+
+def _plain(series):
+    # Plain ints so later incremental updates do not mix in numpy scalars
+    return {key: int(value) for key, value in series.items()}
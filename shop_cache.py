@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class SharedCache:
+    """Thread-safe LRU cache with per-entry TTL, shared by every session.
+
+    Entries live in namespaces such as "products", "users" or "orders".
+    Invalidating a whole namespace bumps its generation counter, so it
+    costs O(1) however many entries it holds; stale entries are dropped
+    when they are next read or evicted.
+    """
+
+    def __init__(self, max_entries=10000, default_ttl=None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()   # (namespace, key) -> (value, expires at, generation)
+        self._generations = {}          # namespace -> generation counter
+        self._stats = {}                # namespace -> counters
+        self._lock = threading.Lock()
+
+    def _counters(self, namespace):
+        counters = self._stats.get(namespace)
+        if counters is None:
+            counters = self._stats[namespace] = {
+                "hits": 0, "misses": 0, "evictions": 0, "expired": 0, "invalidations": 0
+            }
+        return counters
+
+    def get(self, namespace, key, default=None):
+        entry_key = (namespace, key)
+        with self._lock:
+            counters = self._counters(namespace)
+            entry = self._entries.get(entry_key)
+            if entry is not None:
+                value, expires_at, generation = entry
+                if generation != self._generations.get(namespace, 0):
+                    del self._entries[entry_key]
+                elif expires_at is not None and expires_at < time.monotonic():
+                    del self._entries[entry_key]
+                    counters["expired"] += 1
+                else:
+                    self._entries.move_to_end(entry_key)
+                    counters["hits"] += 1
+                    return value
+            counters["misses"] += 1
+            return default
+
+    def set(self, namespace, key, value, ttl=None):
+        self._store(namespace, key, value, ttl, None)
+
+    def get_or_compute(self, namespace, key, compute, ttl=None):
+        """Return the cached value, computing and storing it on a miss"""
+        value = self.get(namespace, key, _MISSING)
+        if value is _MISSING:
+            # An invalidation that lands while computing makes the result stale
+            with self._lock:
+                generation = self._generations.get(namespace, 0)
+            value = compute()
+            self._store(namespace, key, value, ttl, generation)
+        return value
+
+    def _store(self, namespace, key, value, ttl, generation):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            current = self._generations.get(namespace, 0)
+            if generation is not None and generation != current:
+                return
+            self._entries[(namespace, key)] = (value, expires_at, current)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                (evicted_namespace, _), _ = self._entries.popitem(last=False)
+                self._counters(evicted_namespace)["evictions"] += 1
+
+    def invalidate(self, namespace, key=_MISSING):
+        """Drop one entry, or every entry of the namespace when no key is given"""
+        with self._lock:
+            self._counters(namespace)["invalidations"] += 1
+            if key is _MISSING:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            else:
+                self._entries.pop((namespace, key), None)
+
+    def stats(self):
+        """Return a copy of the per-namespace counters with hit rates"""
+        with self._lock:
+            report = {}
+            for namespace, counters in self._stats.items():
+                lookups = counters["hits"] + counters["misses"]
+                report[namespace] = dict(counters, hit_rate=counters["hits"] / lookups if lookups else 0.0)
+            return report
+
+    def __len__(self):
+        return len(self._entries)
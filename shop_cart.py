@@ -0,0 +1,73 @@
+class Cart:
+    """Shopping cart keyed by product id with running totals.
+
+    Item count and subtotal are updated on every change, so reading them
+    never walks the cart. Money is tracked in whole cents to keep the
+    running subtotal free of float drift. Each line keeps the unit price
+    from when it was first added, so a later repricing of the product
+    cannot make the subtotal and the placed order disagree.
+    """
+
+    def __init__(self):
+        self.items = {}         # product id -> {'product': ..., 'quantity': ..., 'unit_cents': ...}
+        self.count = 0
+        self._subtotal_cents = 0
+
+    @property
+    def subtotal(self):
+        return self._subtotal_cents / 100
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items.values())
+
+    def __contains__(self, product_id):
+        return product_id in self.items
+
+    def get(self, product_id):
+        return self.items.get(product_id)
+
+    def add(self, product, quantity=1):
+        """Add quantity of product, merging with an existing line"""
+        item = self.items.get(product['id'])
+        if item is None:
+            item = self.items[product['id']] = {
+                'product': product, 'quantity': quantity, 'unit_cents': _cents(product['price'])
+            }
+        else:
+            item['quantity'] += quantity
+        self.count += quantity
+        self._subtotal_cents += item['unit_cents'] * quantity
+
+    def remove(self, product_id):
+        """Drop a line from the cart"""
+        item = self.items.pop(product_id, None)
+        if item is None:
+            return None
+        self.count -= item['quantity']
+        self._subtotal_cents -= item['unit_cents'] * item['quantity']
+        return item
+
+    def update_quantity(self, product_id, quantity):
+        """Set the quantity of a line; zero or less removes it"""
+        item = self.items.get(product_id)
+        if item is None:
+            return
+        if quantity <= 0:
+            self.remove(product_id)
+            return
+        delta = quantity - item['quantity']
+        item['quantity'] = quantity
+        self.count += delta
+        self._subtotal_cents += item['unit_cents'] * delta
+
+    def clear(self):
+        self.items = {}
+        self.count = 0
+        self._subtotal_cents = 0
+
+
+def _cents(price):
+    return round(price * 100)
@@ -0,0 +1,338 @@
+import bisect
+import threading
+from array import array
+
+
+class ProductCatalog:
+    """Product store with category, price and rating indexes.
+
+    Changes and multi-step reads hold self.lock. Listeners run while it is
+    held, so indexes that share it, such as the search index, are never
+    read half updated.
+    """
+
+    def __init__(self, products=()):
+        self.products = {}          # product id -> product dict
+        self.by_category = {}       # category -> set of product ids
+        self._ids = array('q')      # every product id, sorted
+        # Sorted parallel arrays used for bisect range queries
+        self._prices = array('d')
+        self._price_ids = array('q')
+        self._ratings = array('d')
+        self._rating_ids = array('q')
+        self._listeners = []
+        self._change_listeners = []
+        self.lock = threading.RLock()
+        self.rating_total = 0.0
+        self.load(products)
+
+    def load(self, products):
+        """Insert or replace many products at once.
+
+        New keys are sorted once and merged into the range indexes in a
+        single pass, instead of one array insert per product. When an id
+        appears more than once, the last version wins.
+        """
+        loaded = {product['id']: product for product in products}.values()
+        if not loaded:
+            return
+        with self.lock:
+            self._load(loaded)
+
+    def _load(self, loaded):
+        replaced = []
+        new_ids = []
+        for product in loaded:
+            product_id = product['id']
+            old = self.products.get(product_id)
+            if old is not None:
+                replaced.append(old)
+                self._unlink_category(old)
+                self.rating_total -= old['rating']
+            else:
+                new_ids.append(product_id)
+            self.products[product_id] = product
+            self.by_category.setdefault(product['category'], set()).add(product_id)
+            self.rating_total += product['rating']
+        self._prices, self._price_ids = _merge_sorted(
+            self._prices, self._price_ids,
+            [(p['price'], p['id']) for p in replaced], sorted((p['price'], p['id']) for p in loaded)
+        )
+        self._ratings, self._rating_ids = _merge_sorted(
+            self._ratings, self._rating_ids,
+            [(p['rating'], p['id']) for p in replaced], sorted((p['rating'], p['id']) for p in loaded)
+        )
+        self._ids = _merge_ids(self._ids, sorted(new_ids))
+        for product in loaded:
+            self._notify("add", product)
+        self._changed()
+
+    def __len__(self):
+        return len(self.products)
+
+    def __contains__(self, product_id):
+        return product_id in self.products
+
+    def __iter__(self):
+        # Iterate over a copy so a concurrent change cannot break the loop
+        with self.lock:
+            return iter(list(self.products.values()))
+
+    def get(self, product_id):
+        return self.products.get(product_id)
+
+    def add_listener(self, listener):
+        """Call listener(event, product) whenever a product is added or removed"""
+        self._listeners.append(listener)
+
+    def add_change_listener(self, listener):
+        """Call listener() once after each load, add or remove, however many products it touched"""
+        self._change_listeners.append(listener)
+
+    def _notify(self, event, product):
+        for listener in self._listeners:
+            listener(event, product)
+
+    def _changed(self):
+        for listener in self._change_listeners:
+            listener()
+
+    def average_rating(self):
+        return self.rating_total / len(self.products) if self.products else 0.0
+
+    def categories(self):
+        """Return the sorted list of categories that have products"""
+        with self.lock:
+            return sorted(self.by_category)
+
+    def add_product(self, product):
+        """Insert or replace a product and update every index"""
+        with self.lock:
+            self._remove_product(product['id'])
+            product_id = product['id']
+            self.products[product_id] = product
+            self.by_category.setdefault(product['category'], set()).add(product_id)
+            self.rating_total += product['rating']
+            self._ids.insert(bisect.bisect_left(self._ids, product_id), product_id)
+            _sorted_insert(self._prices, self._price_ids, product['price'], product_id)
+            _sorted_insert(self._ratings, self._rating_ids, product['rating'], product_id)
+            self._notify("add", product)
+            self._changed()
+
+    def remove_product(self, product_id):
+        """Remove a product and its index entries"""
+        with self.lock:
+            product = self._remove_product(product_id)
+            if product is not None:
+                self._changed()
+            return product
+
+    def _remove_product(self, product_id):
+        product = self.products.pop(product_id, None)
+        if product is None:
+            return None
+        self._unlink_category(product)
+        self.rating_total -= product['rating']
+        del self._ids[bisect.bisect_left(self._ids, product_id)]
+        _sorted_remove(self._prices, self._price_ids, product['price'], product_id)
+        _sorted_remove(self._ratings, self._rating_ids, product['rating'], product_id)
+        self._notify("remove", product)
+        return product
+
+    def _unlink_category(self, product):
+        ids = self.by_category.get(product['category'])
+        if ids is not None:
+            ids.discard(product['id'])
+            if not ids:
+                del self.by_category[product['category']]
+
+    def filter(self, category=None, min_price=None, max_price=None, min_rating=None):
+        """Return products matching every given filter, ordered by id"""
+        with self.lock:
+            products = self.products
+            return [products[product_id] for product_id in self._filter(category, min_price, max_price, min_rating)]
+
+    def filter_ids(self, category=None, min_price=None, max_price=None, min_rating=None):
+        """Return an array of the ids of matching products, in id order.
+
+        Each index reports how many products it would yield, and only the
+        smallest candidate set is walked; the other filters are checked on
+        those candidates alone. Without an effective filter this is a copy
+        of the id index.
+        """
+        with self.lock:
+            return self._filter(category, min_price, max_price, min_rating)
+
+    def active_filters(self, category=None, min_price=None, max_price=None, min_rating=None):
+        """Return the filters with every bound that excludes nothing set to None"""
+        with self.lock:
+            if category == "All":
+                category = None
+            if min_price is not None and (not self._prices or min_price <= self._prices[0]):
+                min_price = None
+            if max_price is not None and (not self._prices or max_price >= self._prices[-1]):
+                max_price = None
+            if min_rating is not None and (not self._ratings or min_rating <= self._ratings[0]):
+                min_rating = None
+            return category, min_price, max_price, min_rating
+
+    def _filter(self, category, min_price, max_price, min_rating):
+        category, min_price, max_price, min_rating = self.active_filters(category, min_price, max_price, min_rating)
+        if category is None and min_price is None and max_price is None and min_rating is None:
+            return self._ids[:]
+
+        # (size, kept ids, excluded ids, filters left to check); ids are only sliced once chosen
+        candidates = []
+        if category is not None:
+            candidates.append((
+                len(self.by_category.get(category, ())),
+                lambda: self.by_category.get(category, ()),
+                lambda: [i for other, ids in self.by_category.items() if other != category for i in ids],
+                (None, min_price, max_price, min_rating),
+            ))
+        if min_price is not None or max_price is not None:
+            price_lo = 0 if min_price is None else bisect.bisect_left(self._prices, min_price)
+            price_hi = len(self._prices) if max_price is None else bisect.bisect_right(self._prices, max_price)
+            candidates.append((
+                max(price_hi - price_lo, 0),
+                lambda: self._price_ids[price_lo:price_hi],
+                lambda: self._price_ids[:price_lo] + self._price_ids[price_hi:],
+                (category, None, None, min_rating),
+            ))
+        if min_rating is not None:
+            rating_lo = bisect.bisect_left(self._ratings, min_rating)
+            candidates.append((
+                len(self._ratings) - rating_lo,
+                lambda: self._rating_ids[rating_lo:],
+                lambda: self._rating_ids[:rating_lo],
+                (category, None, None, None),
+            ))
+
+        size, kept, _, remaining = min(candidates, key=lambda candidate: candidate[0])
+        total = len(self._ids)
+        if sum(total - candidate[0] for candidate in candidates) < size:
+            # Every filter keeps most products: drop the few they exclude instead
+            excluded = set()
+            for _, _, dropped, _ in candidates:
+                excluded.update(dropped())
+            if len(excluded) * 16 < total:
+                return _without(self._ids, sorted(excluded))
+            return array('q', [product_id for product_id in self._ids if product_id not in excluded])
+        ids = kept()
+        if any(value is not None for value in remaining):
+            products = self.products
+            ids = [product_id for product_id in ids if product_matches(products[product_id], *remaining)]
+        return array('q', sorted(ids))
+
+
+def product_matches(product, category=None, min_price=None, max_price=None, min_rating=None):
+    """Check a single product against the catalog filters"""
+    if category not in (None, "All") and product['category'] != category:
+        return False
+    if min_price is not None and product['price'] < min_price:
+        return False
+    if max_price is not None and product['price'] > max_price:
+        return False
+    if min_rating is not None and product['rating'] < min_rating:
+        return False
+    return True
+
+
+# The range indexes are parallel arrays ordered by (key, product id), so an
+# entry is found with two bisects even inside a long run of equal keys.
+
+def _position(keys, ids, key, product_id):
+    lo = bisect.bisect_left(keys, key)
+    hi = bisect.bisect_right(keys, key, lo)
+    return bisect.bisect_left(ids, product_id, lo, hi)
+
+
+def _merge_sorted(keys, ids, removed, additions):
+    """Return new arrays without the removed (key, id) pairs and with the
+    sorted additions merged in.
+
+    Positions are found by bisecting the old arrays and the untouched runs
+    between them are copied as slices, so k changes cost O(k log n) plus
+    one copy of the arrays rather than a Python step per entry.
+    """
+    drops = []
+    for key, product_id in removed:
+        i = _position(keys, ids, key, product_id)
+        if i < len(ids) and ids[i] == product_id and keys[i] == key:
+            drops.append(i)
+    drops.sort()
+    merged_keys = array('d')
+    merged_ids = array('q')
+    start = 0
+    d = 0
+
+    def copy_until(end):
+        nonlocal start, d
+        while d < len(drops) and drops[d] < end:
+            merged_keys.extend(keys[start:drops[d]])
+            merged_ids.extend(ids[start:drops[d]])
+            start = drops[d] + 1
+            d += 1
+        if end > start:
+            merged_keys.extend(keys[start:end])
+            merged_ids.extend(ids[start:end])
+            start = end
+
+    for key, product_id in additions:
+        copy_until(_position(keys, ids, key, product_id))
+        merged_keys.append(key)
+        merged_ids.append(product_id)
+    copy_until(len(keys))
+    return merged_keys, merged_ids
+
+
+def _merge_ids(ids, additions):
+    """Return a new id array with the sorted, not yet present additions merged in"""
+    if not additions or not ids or additions[0] > ids[-1]:
+        return ids + array('q', additions)
+    merged = array('q')
+    start = 0
+    for product_id in additions:
+        end = bisect.bisect_left(ids, product_id, start)
+        merged.extend(ids[start:end])
+        merged.append(product_id)
+        start = end
+    merged.extend(ids[start:])
+    return merged
+
+
+def _without(ids, drops):
+    """Return a copy of the sorted id array without the sorted drops"""
+    kept = array('q')
+    start = 0
+    for product_id in drops:
+        end = bisect.bisect_left(ids, product_id, start)
+        kept.extend(ids[start:end])
+        start = end + 1
+    kept.extend(ids[start:])
+    return kept
+
+
+def _sorted_insert(keys, ids, key, product_id):
+    i = _position(keys, ids, key, product_id)
+    keys.insert(i, key)
+    ids.insert(i, product_id)
+
+
+def _sorted_remove(keys, ids, key, product_id):
+    i = _position(keys, ids, key, product_id)
+    if i < len(ids) and ids[i] == product_id and keys[i] == key:
+        del keys[i]
+        del ids[i]
+
+
+def page_count(total, per_page):
+    """Number of pages needed to show total items, never less than one"""
+    return max(1, -(-total // per_page))
+
+
+def page_slice(items, page, per_page):
+    """Return the items on a 1-based page"""
+    page = min(max(page, 1), page_count(len(items), per_page))
+    start = (page - 1) * per_page
+    return items[start:start + per_page]
@@ -0,0 +1,169 @@
+"""Streaming product import from CSV or JSON-lines supplier feeds.
+
+Rows are read and validated in chunks with pandas, so memory stays bounded
+by the chunk size no matter how large the feed is. Valid rows are upserted
+into the catalog, whose listeners keep the search index and inventory up
+to date.
+
+Run directly to validate a feed without importing it:
+    python shop_import.py products.csv
+"""
+import os
+import sys
+
+CHUNK_ROWS = 50000
+REQUIRED_COLUMNS = ("id", "name", "price", "category", "stock", "rating")
+DEFAULT_IMAGE = "📦"
+
+
+class ImportProgress:
+    """Running totals reported after every chunk"""
+
+    def __init__(self, total_bytes=None):
+        self.rows = 0
+        self.imported = 0
+        self.rejected = 0
+        self.reasons = {}       # reason -> rejected row count
+        self.bytes_read = 0
+        self.total_bytes = total_bytes
+
+    @property
+    def fraction(self):
+        """Share of the input consumed so far, when the size is known"""
+        if not self.total_bytes:
+            return None
+        return min(self.bytes_read / self.total_bytes, 1.0)
+
+
+def read_chunks(source, fmt=None, chunk_rows=CHUNK_ROWS):
+    """Yield DataFrames of at most chunk_rows rows from a CSV or JSONL source"""
+    import pandas as pd
+
+    if fmt is None:
+        name = str(getattr(source, "name", source))
+        fmt = "jsonl" if name.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+    if fmt == "csv":
+        reader = pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=False)
+    else:
+        reader = pd.read_json(source, lines=True, chunksize=chunk_rows, dtype=False)
+    with reader:
+        yield from reader
+
+
+def validate_chunk(frame):
+    """Split a chunk into clean product dicts and per-reason rejection counts.
+
+    Every check is a vectorized column operation; rows are only turned into
+    dicts once they have passed.
+    """
+    import pandas as pd
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    ids = pd.to_numeric(frame["id"], errors="coerce")
+    price = pd.to_numeric(frame["price"], errors="coerce")
+    stock = pd.to_numeric(frame["stock"], errors="coerce")
+    rating = pd.to_numeric(frame["rating"], errors="coerce")
+    # JSON-lines feeds give NaN for null or missing text, which astype(str) would turn into "nan"
+    name = frame["name"].fillna("").astype(str).str.strip()
+    category = frame["category"].fillna("").astype(str).str.strip()
+
+    checks = {
+        "bad id": ids.isna() | (ids % 1 != 0),
+        "missing name": frame["name"].isna() | (name == ""),
+        "bad price": price.isna() | (price <= 0),
+        "bad stock": stock.isna() | (stock < 0) | (stock % 1 != 0),
+        "bad rating": rating.isna() | (rating < 0) | (rating > 5),
+        "missing category": frame["category"].isna() | (category == ""),
+    }
+    rejected = pd.Series(False, index=frame.index)
+    reasons = {}
+    for reason, failed in checks.items():
+        # Count each row once, under the first check it fails
+        new = failed & ~rejected
+        if new.any():
+            reasons[reason] = int(new.sum())
+        rejected |= failed
+    ok = ~rejected
+
+    if "description" in frame.columns:
+        description = frame["description"].fillna("").astype(str)
+    else:
+        description = pd.Series("", index=frame.index)
+    if "image" in frame.columns:
+        image = frame["image"].fillna("").astype(str).replace("", DEFAULT_IMAGE)
+    else:
+        image = pd.Series(DEFAULT_IMAGE, index=frame.index)
+
+    products = [
+        {
+            "id": int(row[0]),
+            "name": row[1],
+            "price": float(row[2]),
+            "category": row[3],
+            "description": row[4],
+            "image": row[5],
+            "stock": int(row[6]),
+            "rating": float(row[7]),
+        }
+        for row in zip(ids[ok], name[ok], price[ok], category[ok], description[ok],
+                       image[ok], stock[ok], rating[ok])
+    ]
+    return products, reasons
+
+
+def import_products(source, catalog=None, fmt=None, chunk_rows=CHUNK_ROWS, on_progress=None,
+                    on_products=None):
+    """Stream a file path or binary file object into catalog chunk by chunk.
+
+    With catalog=None the feed is only validated. on_products, if given, is
+    called with each chunk's valid products once they are loaded, and
+    on_progress with the ImportProgress after every chunk.
+    """
+    if isinstance(source, str):
+        if fmt is None:
+            fmt = "jsonl" if source.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+        with open(source, 'rb') as f:
+            return import_products(f, catalog, fmt, chunk_rows, on_progress, on_products)
+
+    progress = ImportProgress(getattr(source, "size", None) or _stream_size(source))
+    for frame in read_chunks(source, fmt, chunk_rows):
+        products, reasons = validate_chunk(frame)
+        if catalog is not None and products:
+            catalog.load(products)
+        if on_products is not None and products:
+            on_products(products)
+        progress.rows += len(frame)
+        progress.imported += len(products)
+        progress.rejected += len(frame) - len(products)
+        for reason, count in reasons.items():
+            progress.reasons[reason] = progress.reasons.get(reason, 0) + count
+        if progress.total_bytes:
+            progress.bytes_read = source.tell()
+        if on_progress is not None:
+            on_progress(progress)
+    progress.bytes_read = progress.total_bytes or 0
+    return progress
+
+
+def _stream_size(f):
+    try:
+        return os.fstat(f.fileno()).st_size
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _print_progress(progress):
+    print(f"{progress.rows:>12,} rows  {progress.imported:>12,} valid  {progress.rejected:>10,} rejected",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python shop_import.py FEED.csv|FEED.jsonl")
+    result = import_products(sys.argv[1], on_progress=_print_progress)
+    for reason, count in sorted(result.reasons.items()):
+        print(f"{reason}: {count}")
+    print(f"{result.imported} valid rows, {result.rejected} rejected")
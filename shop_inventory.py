@@ -0,0 +1,134 @@
+import threading
+
+LOCK_STRIPES = 64
+
+
+class OutOfStockError(Exception):
+    """Raised when a reservation asks for more units than are available"""
+
+    def __init__(self, product_id, requested, available):
+        super().__init__(f"Only {available} left of product {product_id}, {requested} requested")
+        self.product_id = product_id
+        self.requested = requested
+        self.available = available
+
+
+class Reservation:
+    """Stock held for one checkout until it is committed or released"""
+
+    __slots__ = ("lines", "state")
+
+    def __init__(self, lines):
+        self.lines = lines      # product id -> quantity
+        self.state = "held"
+
+
+class Inventory:
+    """Stock levels guarded by striped per-product locks.
+
+    reserve() takes the locks of every product in the order, in a fixed
+    order so concurrent checkouts cannot deadlock, and either holds all of
+    the requested units or none of them. Checkouts of different products
+    only contend when their ids share a lock stripe.
+    """
+
+    def __init__(self, stripes=LOCK_STRIPES):
+        self.available = {}     # product id -> units that can still be reserved
+        self.reserved = {}      # product id -> units held by open reservations
+        self.products = {}      # product id -> catalog product dict to keep in sync
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    @classmethod
+    def for_catalog(cls, catalog):
+        """Track the stock of every catalog product and follow later changes"""
+        inventory = cls()
+        for product in catalog:
+            inventory.track(product)
+        catalog.add_listener(inventory.on_catalog_change)
+        return inventory
+
+    def on_catalog_change(self, event, product):
+        if event == "add":
+            self.track(product)
+        elif event == "remove":
+            self.untrack(product['id'])
+
+    def _stripe(self, product_id):
+        return hash(product_id) % len(self._locks)
+
+    def _lock(self, product_id):
+        return self._locks[self._stripe(product_id)]
+
+    def track(self, product):
+        """Take the stock level of a new or updated product"""
+        with self._lock(product['id']):
+            self.products[product['id']] = product
+            held = self.reserved.get(product['id'], 0)
+            self.available[product['id']] = max(product['stock'] - held, 0)
+            product['stock'] = self.available[product['id']]
+
+    def untrack(self, product_id):
+        with self._lock(product_id):
+            self.available.pop(product_id, None)
+            self.products.pop(product_id, None)
+
+    def remove_sold(self, product_id, quantity):
+        """Take units sold before a restart off the stock, never below zero"""
+        with self._lock(product_id):
+            if product_id in self.available:
+                self._adjust(product_id, -min(quantity, self.available[product_id]), 0)
+
+    def stock(self, product_id):
+        return self.available.get(product_id, 0)
+
+    def reserve(self, lines):
+        """Hold stock for (product id, quantity) pairs, all or nothing"""
+        wanted = {}
+        for product_id, quantity in lines:
+            wanted[product_id] = wanted.get(product_id, 0) + quantity
+        stripes = sorted({self._stripe(product_id) for product_id in wanted})
+        locks = [self._locks[stripe] for stripe in stripes]
+        for lock in locks:
+            lock.acquire()
+        try:
+            for product_id, quantity in wanted.items():
+                available = self.available.get(product_id, 0)
+                if quantity > available:
+                    raise OutOfStockError(product_id, quantity, available)
+            for product_id, quantity in wanted.items():
+                self._adjust(product_id, -quantity, quantity)
+        finally:
+            for lock in locks:
+                lock.release()
+        return Reservation(wanted)
+
+    def commit(self, reservation):
+        """Turn held stock into sold stock"""
+        if reservation.state != "held":
+            return
+        for product_id, quantity in reservation.lines.items():
+            with self._lock(product_id):
+                self._adjust(product_id, 0, -quantity)
+        reservation.state = "committed"
+
+    def release(self, reservation):
+        """Return held stock, e.g. when the order could not be placed"""
+        if reservation.state != "held":
+            return
+        for product_id, quantity in reservation.lines.items():
+            with self._lock(product_id):
+                self._adjust(product_id, quantity, -quantity)
+        reservation.state = "released"
+
+    def _adjust(self, product_id, available_delta, reserved_delta):
+        # Caller holds the product's lock
+        if product_id in self.available:
+            self.available[product_id] += available_delta
+        held = self.reserved.get(product_id, 0) + reserved_delta
+        if held:
+            self.reserved[product_id] = held
+        else:
+            self.reserved.pop(product_id, None)
+        product = self.products.get(product_id)
+        if product is not None:
+            product['stock'] = self.available[product_id]
@@ -0,0 +1,166 @@
+"""Headless load generator for the online shop.
+
+Simulated shoppers register, log in, browse and search the catalog, fill
+a cart and check out against a Shop built in a scratch directory, pausing
+between steps like real users. Each operation is timed and the run ends
+with throughput and p50/p95/p99 latency per operation.
+
+Run with: python shop_loadtest.py --shoppers 2000 --concurrency 200
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from shop_cart import Cart
+from shop_service import Shop
+
+CATEGORIES = ["Electronics", "Clothing", "Sports", "Home & Kitchen", "Home & Garden", "Toys", "Books"]
+WORDS = ["wireless", "smart", "organic", "running", "coffee", "yoga", "laptop", "plant",
+         "classic", "pro", "mini", "deluxe", "travel", "kids", "outdoor", "premium"]
+QUERIES = ["wireless", "smart watch", "yoga", "coffee", "pro", "kids outdoor", "travel"]
+
+
+def make_products(count, seed=0):
+    """Synthetic catalog with the same fields as the demo products"""
+    rng = random.Random(seed)
+    products = []
+    for product_id in range(1, count + 1):
+        name = " ".join(rng.sample(WORDS, 3)).title()
+        products.append({
+            "id": product_id,
+            "name": name,
+            "price": round(rng.uniform(5, 300), 2),
+            "category": rng.choice(CATEGORIES),
+            "description": f"{name} for everyday use",
+            "image": "📦",
+            "stock": rng.randint(50, 5000),
+            "rating": round(rng.uniform(1, 5), 1),
+        })
+    return products
+
+
+class LatencyRecorder:
+    """Collects per-operation latencies and error counts from many threads"""
+
+    def __init__(self):
+        self.samples = {}       # operation -> list of seconds
+        self.errors = {}        # operation -> {error name: count}
+        self._lock = threading.Lock()
+
+    def time(self, operation, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        except Exception as e:
+            with self._lock:
+                errors = self.errors.setdefault(operation, {})
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            return None
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.samples.setdefault(operation, []).append(elapsed)
+
+    def report(self, wall_time):
+        lines = [f"{'operation':<16}{'count':>9}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  errors"]
+        for operation in sorted(self.samples):
+            samples = sorted(self.samples[operation])
+            errors = ", ".join(f"{name}={count}" for name, count in self.errors.get(operation, {}).items())
+            lines.append(
+                f"{operation:<16}{len(samples):>9}{len(samples) / wall_time:>10.1f}"
+                f"{_percentile(samples, 50) * 1000:>10.2f}{_percentile(samples, 95) * 1000:>10.2f}"
+                f"{_percentile(samples, 99) * 1000:>10.2f}  {errors}"
+            )
+        return "\n".join(lines)
+
+
+def _percentile(samples, percent):
+    # Nearest-rank percentile of an already sorted list
+    if not samples:
+        return 0.0
+    rank = max(1, -(-len(samples) * percent // 100))
+    return samples[int(rank) - 1]
+
+
+def shopper_session(shop, recorder, shopper_id, think_time, rng):
+    """One simulated visit: sign up, browse, fill a cart and maybe check out"""
+    def think():
+        if think_time:
+            time.sleep(rng.expovariate(1 / think_time))
+
+    username = f"shopper{shopper_id}"
+    recorder.time("register_user", shop.register_user, username, f"{username}@example.com", "secret")
+    think()
+    result = recorder.time("login_user", shop.login_user, username, "secret")
+    if not result or not result[0]:
+        return
+    user = result[1]
+    think()
+
+    cart = Cart()
+    for _ in range(rng.randint(1, 5)):
+        if rng.random() < 0.3:
+            query, category = rng.choice(QUERIES), "All"
+        else:
+            query, category = "", rng.choice(["All"] + CATEGORIES)
+        low = rng.choice([0, 0, 20, 50, 100])
+        found = recorder.time(
+            "find_products", shop.find_products,
+            query, category, low, rng.choice([300, 300, 150]), rng.choice([0.0, 0.0, 3.0, 4.0]), 0, 48
+        )
+        think()
+        if found and found[1]:
+            product = shop.catalog.get(rng.choice(found[1]))
+            if product is not None:
+                recorder.time("add_to_cart", cart.add, product, rng.randint(1, 3))
+                think()
+
+    if cart and rng.random() < 0.6:
+        recorder.time("create_order", shop.create_order, user, cart, "1 Load Test Way")
+
+
+def run(shoppers, concurrency, products, think_time, data_dir=None, seed=0):
+    """Drive shoppers sessions through concurrency worker threads"""
+    scratch = data_dir or tempfile.mkdtemp(prefix="shop-loadtest-")
+    try:
+        shop = Shop(make_products(products, seed), data_dir=scratch)
+        # Build the lazy indexes up front so the run measures steady state
+        shop.search_index, shop.analytics, shop.recommender
+        recorder = LatencyRecorder()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            sessions = [
+                pool.submit(shopper_session, shop, recorder, shopper_id, think_time,
+                            random.Random(seed * 1000003 + shopper_id))
+                for shopper_id in range(shoppers)
+            ]
+            for session in sessions:
+                # Surface bugs in the harness itself rather than dropping them
+                session.result()
+        wall_time = time.perf_counter() - started
+        # Orders are finished in the background; wait for the last batches
+        shop.close()
+        print(f"{shoppers} shoppers, {concurrency} concurrent, {products} products, "
+              f"think time {think_time * 1000:.0f} ms, {wall_time:.2f} s")
+        print(recorder.report(wall_time))
+        print(f"orders written: {len(shop.orders)}")
+        return recorder
+    finally:
+        if data_dir is None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shoppers", type=int, default=1000, help="simulated shopper sessions")
+    parser.add_argument("--concurrency", type=int, default=100, help="shoppers active at once")
+    parser.add_argument("--products", type=int, default=10000, help="synthetic catalog size")
+    parser.add_argument("--think-time", type=float, default=0.05, help="mean pause between steps, in seconds")
+    parser.add_argument("--data-dir", help="keep users.db and orders/ here instead of a scratch directory")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.shoppers, args.concurrency, args.products, args.think_time, args.data_dir, args.seed)
@@ -0,0 +1,288 @@
+import json
+import os
+import struct
+import sys
+import threading
+import time
+import uuid
+from array import array
+from datetime import datetime
+
+SEGMENT_BYTES = 64 * 1024 * 1024
+
+# Order statuses, in the order the pipeline moves through them
+PENDING = "Pending"
+PROCESSING = "Processing"
+PAID = "Paid"
+DECLINED = "Payment Declined"
+FAILED = "Failed"
+FINAL_STATUSES = (PAID, DECLINED, FAILED)
+
+# Packed order: 16-byte uuid and epoch seconds, then one entry per line of
+# product id, quantity and unit price in cents, all little-endian unsigned
+# 32-bit
+ORDER_HEADER = struct.Struct("<16sI")
+ORDER_LINE = struct.Struct("<III")
+
+
+class Order:
+    """Compact order record.
+
+    The id (16 raw uuid bytes), created_at (epoch seconds) and the (product
+    id, quantity, unit price in cents at purchase time) lines are packed
+    into one bytes object, 20 bytes plus 12 per line. The customer is
+    referenced by username, so an order holds no product or user dicts.
+    Names and images are resolved through the catalog when the order is
+    displayed, and id_text, created and day format the packed fields.
+    Usernames, addresses and statuses read back from the log are interned,
+    so orders share them.
+    """
+
+    __slots__ = ("packed", "username", "shipping_address", "status")
+
+    def __init__(self, id, username, line_table, shipping_address,
+                 status=PENDING, created_at=None):
+        created_at = int(time.time()) if created_at is None else created_at
+        self.packed = ORDER_HEADER.pack(id, created_at) + b"".join(
+            ORDER_LINE.pack(*line_table[i:i + 3]) for i in range(0, len(line_table), 3)
+        )
+        self.username = username
+        self.shipping_address = shipping_address
+        self.status = status
+
+    @classmethod
+    def from_cart(cls, username, cart, shipping_address):
+        line_table = []
+        for item in cart:
+            line_table += (item['product']['id'], item['quantity'], item['unit_cents'])
+        return cls(uuid.uuid4().bytes, username, line_table, shipping_address)
+
+    @classmethod
+    def from_record(cls, record):
+        created_at = record['created_at']
+        if isinstance(created_at, str):
+            # Logs written before epoch timestamps hold ISO text here
+            created_at = int(datetime.fromisoformat(created_at).timestamp())
+        return cls(_parse_id(record['id']), sys.intern(record['user']), record['lines'],
+                   sys.intern(record['shipping_address']), sys.intern(record['status']), created_at)
+
+    def to_record(self):
+        return {
+            "id": self.id.hex(),
+            "user": self.username,
+            "lines": self.line_table.tolist(),
+            "shipping_address": self.shipping_address,
+            "status": self.status,
+            "created_at": self.created_at,
+        }
+
+    @property
+    def id(self):
+        return self.packed[:16]
+
+    @property
+    def created_at(self):
+        return ORDER_HEADER.unpack_from(self.packed)[1]
+
+    @property
+    def line_table(self):
+        """Lines as a flat array of (product id, quantity, unit cents) triples"""
+        table = array('q')
+        for line in self._lines():
+            table.extend(line)
+        return table
+
+    def _lines(self):
+        return ORDER_LINE.iter_unpack(memoryview(self.packed)[ORDER_HEADER.size:])
+
+    @property
+    def id_text(self):
+        return str(uuid.UUID(bytes=self.id))
+
+    @property
+    def created(self):
+        """Local datetime the order was placed"""
+        return datetime.fromtimestamp(self.created_at)
+
+    @property
+    def day(self):
+        """Local date the order was placed, as YYYY-MM-DD"""
+        return self.created.date().isoformat()
+
+    @property
+    def total_cents(self):
+        return sum(quantity * unit_cents for _, quantity, unit_cents in self._lines())
+
+    @property
+    def total(self):
+        return self.total_cents / 100
+
+    @property
+    def failed(self):
+        """True when the order was not paid for and no stock was sold"""
+        return self.status in (DECLINED, FAILED)
+
+    def lines(self):
+        """Yield (product id, quantity, unit price) for each order line"""
+        for product_id, quantity, unit_cents in self._lines():
+            yield product_id, quantity, unit_cents / 100
+
+
+class OrderLog:
+    """Append-only order store split into JSON-lines segment files.
+
+    Every user's orders are indexed by (segment, byte offset), so order
+    history can be read a page at a time without touching anyone else's
+    orders. Order count and total spent per user are kept as running
+    totals while orders are appended. An order that fails after it was
+    written gets a short follow-up record instead of being rewritten.
+    """
+
+    def __init__(self, directory="orders", segment_bytes=SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.by_user = {}       # username -> [(segment number, offset), ...] oldest first
+        self.stats = {}         # username -> [order count, total spent]
+        self.failed_after_write = set()     # ids of written orders later marked Failed
+        self.count = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.segments = sorted(
+            int(name[len("orders-"):-len(".jsonl")])
+            for name in os.listdir(directory)
+            if name.startswith("orders-") and name.endswith(".jsonl")
+        )
+        for segment in self.segments:
+            self._scan(segment)
+        if not self.segments:
+            self.segments.append(1)
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"orders-{segment:06d}.jsonl")
+
+    def _scan(self, segment):
+        """Rebuild the in-memory index from one segment on startup"""
+        offset = 0
+        with open(self._segment_path(segment), 'r+b') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Torn last write; cut it off so the next append starts on a fresh line
+                    f.truncate(offset)
+                    break
+                record = json.loads(line)
+                if "failed" in record:
+                    self._unindex_failed(record)
+                else:
+                    self._index(Order.from_record(record), segment, offset)
+                offset += len(line)
+
+    def _index(self, order, segment, offset):
+        self.by_user.setdefault(order.username, []).append((segment, offset))
+        stats = self.stats.setdefault(order.username, [0, 0])
+        if not order.failed:
+            stats[0] += 1
+            stats[1] += order.total_cents
+        self.count += 1
+
+    def _unindex_failed(self, record):
+        self.failed_after_write.add(_parse_id(record['failed']))
+        stats = self.stats[record['user']]
+        stats[0] -= 1
+        stats[1] -= record['cents']
+
+    def _load(self, record):
+        order = Order.from_record(record)
+        if order.id in self.failed_after_write:
+            order.status = FAILED
+        return order
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Yield every order, oldest first"""
+        for segment in self.segments:
+            path = self._segment_path(segment)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                for line in f:
+                    if line.endswith(b"\n"):
+                        record = json.loads(line)
+                        if "failed" not in record:
+                            yield self._load(record)
+
+    def append(self, order):
+        """Write an order to the end of the log and index it"""
+        self.append_many([order])
+        return order
+
+    def append_many(self, orders):
+        """Write a batch of orders with a single write and index them"""
+        lines = [_encode(order.to_record()) for order in orders]
+        with self._lock:
+            segment, offset = self._write(lines)
+            for order, line in zip(orders, lines):
+                self._index(order, segment, offset)
+                offset += len(line)
+
+    def mark_failed(self, order):
+        """Record that a written, successful order failed afterwards"""
+        record = {"failed": order.id.hex(), "user": order.username, "cents": order.total_cents}
+        with self._lock:
+            if order.id in self.failed_after_write:
+                return
+            self._write([_encode(record)])
+            self._unindex_failed(record)
+        order.status = FAILED
+
+    def _write(self, lines):
+        # Caller holds the lock; returns where the first line starts
+        segment = self.segments[-1]
+        path = self._segment_path(segment)
+        size = sum(len(line) for line in lines)
+        if os.path.exists(path) and os.path.getsize(path) + size > self.segment_bytes:
+            segment += 1
+            self.segments.append(segment)
+            path = self._segment_path(segment)
+        with open(path, 'ab') as f:
+            offset = f.tell()
+            f.write(b"".join(lines))
+        return segment, offset
+
+    def user_order_count(self, username):
+        """Number of orders a user has placed, failed ones included"""
+        return len(self.by_user.get(username, ()))
+
+    def user_stats(self, username):
+        """Return (order count, total spent) for a user, leaving out failed orders"""
+        count, total_cents = self.stats.get(username, (0, 0))
+        return count, total_cents / 100
+
+    def user_orders(self, username, start=0, limit=None):
+        """Yield a user's orders newest first, reading only the requested page"""
+        positions = self.by_user.get(username, [])
+        end = len(positions) - start
+        if end <= 0:
+            return
+        begin = 0 if limit is None else max(end - limit, 0)
+        handles = {}
+        try:
+            for segment, offset in reversed(positions[begin:end]):
+                f = handles.get(segment)
+                if f is None:
+                    f = handles[segment] = open(self._segment_path(segment), 'rb')
+                f.seek(offset)
+                yield self._load(json.loads(f.readline()))
+        finally:
+            for f in handles.values():
+                f.close()
+
+
+def _parse_id(text):
+    # Accepts the hex ids written now and the dashed ones written before
+    return uuid.UUID(text).bytes
+
+
+def _encode(record):
+    return (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
@@ -0,0 +1,158 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from shop_orders import DECLINED, FAILED, PAID, PENDING, PROCESSING
+
+BATCH_SIZE = 200
+BATCH_WAIT = 0.02           # seconds to wait for a batch to fill up
+RECENT_STATUSES = 100000    # finished orders whose status stays pollable
+
+
+def approve_all(orders):
+    """Payment stand-in: accept every order"""
+    return [True] * len(orders)
+
+
+class OrderPipeline:
+    """Finishes placed orders in batches on a background worker thread.
+
+    Checkout only reserves stock and queues the order, so its latency
+    does not depend on the work done afterwards. The worker takes the
+    payment for a batch, writes it to the order log with one write,
+    commits or releases the reserved stock, and feeds paid orders to
+    analytics and recommendations. Orders move from Pending through
+    Processing to Paid, Payment Declined or Failed; status() is a dict
+    lookup so the UI can poll it on every rerun.
+
+    A failure never stops the worker. If it happens before the batch is
+    written, the whole batch fails and gets its stock back. Once an order
+    is written and its stock committed it stays Paid; an error updating
+    analytics or recommendations is only recorded.
+    """
+
+    def __init__(self, shop, payment=approve_all, batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT):
+        self.shop = shop
+        self.payment = payment      # orders -> list of approved flags
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.statuses = OrderedDict()   # order id -> status, oldest first
+        self.errors = 0
+        self.last_error = None
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="order-pipeline", daemon=True)
+        self._worker.start()
+
+    def submit(self, order, reservation):
+        """Queue a placed order whose stock is already reserved"""
+        self._set_status([order], PENDING)
+        self._queue.put((order, reservation))
+
+    def status(self, order_id):
+        """Current status of a recent order, or None if it is not tracked"""
+        return self.statuses.get(order_id)
+
+    def flush(self):
+        """Block until every queued order has been finished"""
+        self._queue.join()
+
+    def close(self):
+        """Finish the queued orders and stop the worker"""
+        self._queue.put(None)
+        self._worker.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self._process(batch)
+            except Exception as e:
+                self._record_error(e)
+                self._fail(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                self._queue.task_done()
+                return
+
+    def _process(self, batch):
+        shop = self.shop
+        orders = [order for order, _ in batch]
+        self._set_status(orders, PROCESSING)
+        try:
+            # Built from the log before this batch is written, so it is counted once
+            analytics = shop.analytics
+            recommender = shop.recommender
+            approved = list(self.payment(orders))
+            if len(approved) != len(orders):
+                raise ValueError(f"Payment returned {len(approved)} results for {len(orders)} orders")
+            for order, ok in zip(orders, approved):
+                order.status = PAID if ok else DECLINED
+            shop.orders.append_many(orders)
+        except Exception as e:
+            self._record_error(e)
+            self._fail(batch)
+            return
+        for order, reservation in batch:
+            try:
+                if order.status != PAID:
+                    shop.inventory.release(reservation)
+                    continue
+                shop.inventory.commit(reservation)
+            except Exception as e:
+                self._record_error(e)
+                self._fail([(order, reservation)], written=True)
+                continue
+            try:
+                analytics.record(order, shop.catalog)
+                recommender.record(order)
+            except Exception as e:
+                # The sale stands; the log rebuilds these on the next start
+                self._record_error(e)
+        self._set_status(orders)
+
+    def _fail(self, batch, written=False):
+        """Mark orders Failed and give back whatever stock they still hold"""
+        for order, reservation in batch:
+            try:
+                self.shop.inventory.release(reservation)
+                if written and order.status == PAID:
+                    self.shop.orders.mark_failed(order)
+                    # Cached order pages are keyed by order count, which this does not change
+                    self.shop.cache.invalidate("orders")
+            except Exception as e:
+                self._record_error(e)
+        self._set_status([order for order, _ in batch], FAILED)
+
+    def _record_error(self, error):
+        with self._lock:
+            self.errors += 1
+            self.last_error = repr(error)
+
+    def _set_status(self, orders, status=None):
+        with self._lock:
+            for order in orders:
+                if status is not None:
+                    order.status = status
+                self.statuses[order.id] = order.status
+                self.statuses.move_to_end(order.id)
+            while len(self.statuses) > RECENT_STATUSES:
+                self.statuses.popitem(last=False)
@@ -0,0 +1,66 @@
+import threading
+
+NEIGHBORS = 5
+# Very large orders would add a quadratic number of pairs; only their
+# first lines are used for co-occurrence counts.
+MAX_PAIRED_LINES = 50
+
+
+class CoOccurrenceIndex:
+    """Sparse item-item co-occurrence counts with cached top neighbors.
+
+    Each order adds one to the count of every pair of distinct products it
+    contains. Counts only grow, so each product's neighbor list can be kept
+    ordered as orders come in and a lookup just reads it.
+    """
+
+    def __init__(self, k=NEIGHBORS):
+        self.k = k
+        self.counts = {}        # product id -> {other product id: times bought together}
+        self.neighbors = {}     # product id -> best other product ids, most frequent first
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_order_log(cls, order_log, k=NEIGHBORS):
+        index = cls(k)
+        for order in order_log:
+            if not order.failed:
+                index.record(order)
+        return index
+
+    def record(self, order):
+        """Count every pair of products bought together in order"""
+        product_ids = list(dict.fromkeys(order.line_table[0::3]))[:MAX_PAIRED_LINES]
+        with self._lock:
+            for a in product_ids:
+                row = self.counts.setdefault(a, {})
+                for b in product_ids:
+                    if a != b:
+                        row[b] = row.get(b, 0) + 1
+                        self._update_neighbors(a, b)
+
+    def _update_neighbors(self, product_id, other_id):
+        row = self.counts[product_id]
+        top = self.neighbors.setdefault(product_id, [])
+        if other_id not in top:
+            if len(top) >= self.k and row[other_id] <= row[top[-1]]:
+                return
+            top.append(other_id)
+        top.sort(key=lambda pid: -row[pid])
+        del top[self.k:]
+
+    def recommend(self, product_id, k=None):
+        """Products most often bought with product_id"""
+        return self.neighbors.get(product_id, [])[:k or self.k]
+
+    def recommend_for(self, product_ids, k=None):
+        """Products most often bought with any of product_ids, excluding them"""
+        exclude = set(product_ids)
+        scores = {}
+        for product_id in exclude:
+            row = self.counts.get(product_id, {})
+            for other_id in self.neighbors.get(product_id, ()):
+                if other_id not in exclude:
+                    scores[other_id] = scores.get(other_id, 0) + row[other_id]
+        ranked = sorted(scores, key=lambda pid: (-scores[pid], pid))
+        return ranked[:k or self.k]
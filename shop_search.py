@@ -0,0 +1,356 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Matches in the name count more than matches in the description
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "category": 2.0,
+    "description": 1.0,
+}
+
+SUGGESTIONS_PER_NODE = 8
+
+# Prefixes this short match so much that only their most frequent
+# completions are searched, as the suggestions show them
+SHORT_PREFIX = 2
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class _TrieNode:
+    __slots__ = ("children", "is_term", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.is_term = False
+        self.top = None     # cached best terms below this node, None when stale
+
+
+class PrefixTrie:
+    """Prefix tree over index terms, ranked by document frequency.
+
+    Each node caches its most frequent completions, merged lazily from its
+    children. A frequency change only clears the caches along the term's
+    path when the count reaches a power of two, so indexing a product stays
+    cheap while suggestion order is never off by more than a factor of two.
+    """
+
+    def __init__(self, frequencies):
+        self.root = _TrieNode()
+        self.frequencies = frequencies
+
+    def _path(self, term):
+        node = self.root
+        nodes = [node]
+        for char in term:
+            node = node.children.get(char)
+            if node is None:
+                return None
+            nodes.append(node)
+        return nodes
+
+    def touch(self, term):
+        """Record that the frequency of term went up"""
+        count = self.frequencies.get(term, 0)
+        if count & (count - 1):
+            return
+        node = self.root
+        node.top = None
+        for char in term:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            node = child
+            node.top = None
+        node.is_term = True
+
+    def forget(self, term):
+        """Record that the frequency of term went down"""
+        count = self.frequencies.get(term, 0)
+        if count & (count - 1):
+            return
+        nodes = self._path(term)
+        if nodes is None:
+            return
+        for node in nodes:
+            node.top = None
+        if count:
+            return
+        nodes[-1].is_term = False
+        # Drop branches that no longer lead to any term
+        for i in range(len(term), 0, -1):
+            node = nodes[i]
+            if node.is_term or node.children:
+                break
+            del nodes[i - 1].children[term[i - 1]]
+
+    def complete(self, prefix, limit=SUGGESTIONS_PER_NODE):
+        """Return the most frequent terms starting with prefix"""
+        nodes = self._path(prefix)
+        if nodes is None:
+            return []
+        return self._top(nodes[-1], prefix)[:limit]
+
+    def terms(self, prefix):
+        """Return every term starting with prefix, in no particular order"""
+        nodes = self._path(prefix)
+        if nodes is None:
+            return []
+        found = []
+        stack = [(nodes[-1], prefix)]
+        while stack:
+            node, term = stack.pop()
+            if node.is_term:
+                found.append(term)
+            for char, child in node.children.items():
+                stack.append((child, term + char))
+        return found
+
+    def _rank(self, term):
+        return (-self.frequencies.get(term, 0), term)
+
+    def _top(self, node, prefix):
+        if node.top is None:
+            candidates = [prefix] if node.is_term else []
+            for char, child in node.children.items():
+                candidates.extend(self._top(child, prefix + char))
+            node.top = heapq.nsmallest(SUGGESTIONS_PER_NODE, candidates, key=self._rank)
+        return node.top
+
+
+class SearchIndex:
+    """Inverted index over product name, description and category.
+
+    Reads and updates hold self.lock. An index built with for_catalog()
+    shares the catalog's lock, so a search never sees a bulk load halfway.
+    """
+
+    def __init__(self):
+        self.postings = {}          # term -> {product id: field weight}
+        self.frequencies = {}       # term -> number of products containing it
+        self.doc_terms = {}         # product id -> terms indexed for it
+        self.trie = PrefixTrie(self.frequencies)
+        self._ranked_ids = {}       # term -> ids by weight then id, built on first search
+        self._union_counts = {}     # completions searched together -> products with any of them
+        self.lock = threading.RLock()
+
+    @classmethod
+    def for_catalog(cls, catalog):
+        """Index every product in catalog and follow its later changes"""
+        index = cls()
+        index.lock = catalog.lock
+        with catalog.lock:
+            for product in catalog:
+                index.add_product(product)
+            catalog.add_listener(index.on_catalog_change)
+        return index
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def on_catalog_change(self, event, product):
+        if event == "add":
+            self.add_product(product)
+        elif event == "remove":
+            self.remove_product(product['id'])
+
+    def add_product(self, product):
+        """Index one product, replacing any previous version of it"""
+        with self.lock:
+            self._add_product(product)
+
+    def _add_product(self, product):
+        product_id = product['id']
+        if product_id in self.doc_terms:
+            self._remove_product(product_id)
+        weights = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(str(product.get(field, ""))):
+                weights[term] = weights.get(term, 0.0) + weight
+        self._union_counts.clear()
+        for term, weight in weights.items():
+            self._ranked_ids.pop(term, None)
+            self.postings.setdefault(term, {})[product_id] = weight
+            self.frequencies[term] = self.frequencies.get(term, 0) + 1
+            self.trie.touch(term)
+        self.doc_terms[product_id] = tuple(weights)
+
+    def remove_product(self, product_id):
+        with self.lock:
+            self._remove_product(product_id)
+
+    def _remove_product(self, product_id):
+        terms = self.doc_terms.pop(product_id, None)
+        if terms is None:
+            return
+        self._union_counts.clear()
+        for term in terms:
+            self._ranked_ids.pop(term, None)
+            posting = self.postings[term]
+            del posting[product_id]
+            self.frequencies[term] -= 1
+            if not posting:
+                del self.postings[term]
+                del self.frequencies[term]
+            self.trie.forget(term)
+
+    def suggest(self, prefix, limit=SUGGESTIONS_PER_NODE):
+        """Autocomplete the last word of prefix"""
+        tokens = tokenize(prefix)
+        if not tokens or not prefix[-1:].isalnum():
+            return []
+        head = " ".join(tokens[:-1])
+        with self.lock:
+            completions = self.trie.complete(tokens[-1], limit)
+        return [f"{head} {term}".strip() for term in completions]
+
+    def search(self, query, limit=None, predicate=None):
+        """Return product ids matching every query word, best match first"""
+        return self.search_page(query, 0, limit, predicate)[1]
+
+    def search_page(self, query, start=0, limit=None, predicate=None):
+        """Return (number of matches, ids of the matches from start on, at
+        most limit of them), best match first.
+
+        The last word is also matched as a prefix so results follow the
+        user while they type. predicate, when given, is called with the
+        product id to drop results before ranking.
+
+        A one-word query without predicate reads the window off each term's
+        ranked posting list. Otherwise the matches are scored in one pass
+        and only the window is ranked, never the whole result.
+        """
+        with self.lock:
+            groups = self._groups(query)
+            if not groups:
+                return 0, []
+            if len(groups) == 1 and predicate is None and limit is not None:
+                return self._prefix_page(groups[0], start, limit)
+            scores = self._scores(groups)
+        if predicate is not None:
+            scores = {pid: score for pid, score in scores.items() if predicate(pid)}
+        return len(scores), _ranked_window(scores, start, limit)
+
+    def _groups(self, query):
+        """One list of terms per query word, the last word's completions included"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        groups = [[term] for term in tokens[:-1] if term in self.postings]
+        if len(groups) < len(tokens) - 1:
+            return []
+        prefix = tokens[-1]
+        if len(prefix) <= SHORT_PREFIX:
+            expansions = self.trie.complete(prefix)
+        else:
+            expansions = self.trie.terms(prefix)
+        if not expansions:
+            return []
+        groups.append(expansions)
+        return groups
+
+    def _ranked(self, term):
+        """Ids in term's posting by weight, then id; kept until the posting changes"""
+        ranked = self._ranked_ids.get(term)
+        if ranked is None:
+            posting = self.postings[term]
+            ranked = self._ranked_ids[term] = sorted(posting, key=lambda pid: (-posting[pid], pid))
+        return ranked
+
+    def _prefix_page(self, terms, start, limit):
+        """(match count, window) for products containing any of terms"""
+        end = start + limit
+        if len(terms) == 1:
+            return len(self.postings[terms[0]]), self._ranked(terms[0])[start:end]
+        # Merging the ranked lists yields each product first at its best score
+        total = len(self.doc_terms)
+        streams = [
+            _scored(self._ranked(term), self.postings[term], math.log(1 + total / self.frequencies[term]))
+            for term in terms
+        ]
+        seen = set()
+        page = []
+        for _, product_id in heapq.merge(*streams):
+            if product_id not in seen:
+                seen.add(product_id)
+                page.append(product_id)
+                if len(page) == end:
+                    break
+        count = self._union_counts.get(tuple(terms))
+        if count is None:
+            count = self._union_counts[tuple(terms)] = len(set().union(*(self.postings[term] for term in terms)))
+        return count, page[start:]
+
+    def _scores(self, groups):
+        """Map each product id matching every group to its score"""
+        # Intersect starting from the rarest group
+        def group_size(group):
+            return sum(self.frequencies[term] for term in group)
+
+        groups.sort(key=group_size)
+        total = len(self.doc_terms)
+        scores = None
+        for group in groups:
+            idfs = [(self.postings[term], math.log(1 + total / self.frequencies[term])) for term in group]
+            if scores is not None and len(scores) * len(idfs) <= group_size(group):
+                # Few candidates left: probe the group's postings for each of them
+                narrowed = {}
+                for product_id, score in scores.items():
+                    best = 0.0
+                    for posting, idf in idfs:
+                        weight = posting.get(product_id)
+                        if weight is not None:
+                            best = max(best, weight * idf)
+                    if best:
+                        narrowed[product_id] = score + best
+                scores = narrowed
+            else:
+                posting, idf = idfs[0]
+                merged = {product_id: weight * idf for product_id, weight in posting.items()}
+                for posting, idf in idfs[1:]:
+                    for product_id, weight in posting.items():
+                        merged[product_id] = max(merged.get(product_id, 0.0), weight * idf)
+                if scores is None:
+                    scores = merged
+                else:
+                    scores = {pid: score + merged[pid] for pid, score in scores.items() if pid in merged}
+            if not scores:
+                return {}
+        return scores
+
+
+def _scored(ranked, posting, idf):
+    for product_id in ranked:
+        yield -posting[product_id] * idf, product_id
+
+
+def _ranked_window(scores, start, limit):
+    """Ids ranked start to start + limit by score, then by id.
+
+    Scores take few distinct values, so they are counted to find the
+    lowest score inside the window. Only the ids above it are sorted; the
+    ids tied at it are cut down with a heap.
+    """
+    if limit is None:
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [product_id for product_id, _ in ranked[start:]]
+    end = start + limit
+    if not scores or end <= 0:
+        return []
+    counts = Counter(scores.values())
+    above = 0
+    for lowest in sorted(counts, reverse=True):
+        if above + counts[lowest] >= end:
+            break
+        above += counts[lowest]
+    ranked = sorted((-score, pid) for pid, score in scores.items() if score > lowest)
+    ties = heapq.nsmallest(end - len(ranked), [pid for pid, score in scores.items() if score == lowest])
+    return ([pid for _, pid in ranked] + ties)[start:end]
@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+
+from app_metrics import instrumented
+from shop_analytics import SalesAnalytics
+from shop_cache import SharedCache
+from shop_catalog import ProductCatalog, product_matches
+from shop_import import import_products
+from shop_inventory import Inventory
+from shop_orders import Order, OrderLog
+from shop_pipeline import OrderPipeline, approve_all
+from shop_recommend import CoOccurrenceIndex
+from shop_search import SearchIndex
+from shop_users import UserStore
+
+
+class Shop:
+    """Every shared store of the shop, wired together without any UI.
+
+    The Streamlit app keeps one Shop per process; headless tools such as
+    the load tester build their own against a separate data directory.
+    Indexes that are expensive to build are created on first use, and
+    placed orders are finished in the background by an OrderPipeline.
+    """
+
+    def __init__(self, products=(), data_dir=".", payment=approve_all):
+        os.makedirs(data_dir, exist_ok=True)
+        self.catalog = ProductCatalog(products)
+        self.orders = OrderLog(os.path.join(data_dir, "orders"))
+        self.imported_path = os.path.join(data_dir, "imported_products.jsonl")
+        stock_since = self._load_imported()
+        self.cache = SharedCache(max_entries=20000, default_ttl=300)
+        self.catalog.add_change_listener(lambda: self.cache.invalidate("products"))
+        self.inventory = Inventory.for_catalog(self.catalog)
+        self._restore_stock(stock_since)
+        self.users = UserStore(
+            os.path.join(data_dir, "users.db"),
+            legacy_json=os.path.join(data_dir, "users.json"),
+            cache=self.cache
+        )
+        self._search_index = None
+        self._analytics = None
+        self._recommender = None
+        self._lock = threading.Lock()
+        self.pipeline = OrderPipeline(self, payment)
+
+    @property
+    def search_index(self):
+        if self._search_index is None:
+            with self._lock:
+                if self._search_index is None:
+                    self._search_index = SearchIndex.for_catalog(self.catalog)
+        return self._search_index
+
+    @property
+    def analytics(self):
+        if self._analytics is None:
+            with self._lock:
+                if self._analytics is None:
+                    self._analytics = SalesAnalytics.from_order_log(self.orders, self.catalog)
+        return self._analytics
+
+    @property
+    def recommender(self):
+        if self._recommender is None:
+            with self._lock:
+                if self._recommender is None:
+                    self._recommender = CoOccurrenceIndex.from_order_log(self.orders)
+        return self._recommender
+
+    # Catalog imports
+    def _load_imported(self, batch_rows=50000):
+        """Replay products saved by earlier imports over the seed catalog.
+
+        Returns product id -> number of orders already logged when that
+        product's stock was imported; orders before then are not sold from
+        the imported stock.
+        """
+        stock_since = {}
+        try:
+            f = open(self.imported_path, 'rb')
+        except FileNotFoundError:
+            return stock_since
+        with f:
+            orders_before = 0
+            batch = []
+            for line in f:
+                if not line.endswith(b"\n"):
+                    continue
+                record = json.loads(line)
+                if "id" not in record:
+                    orders_before = record['orders']
+                    continue
+                batch.append(record)
+                if orders_before:
+                    stock_since[record['id']] = orders_before
+                else:
+                    stock_since.pop(record['id'], None)
+                if len(batch) >= batch_rows:
+                    self.catalog.load(batch)
+                    batch = []
+            self.catalog.load(batch)
+        return stock_since
+
+    def _save_imported(self, products):
+        # Each chunk starts with the order count, so a restart knows which sales its stock already excludes
+        lines = [{"orders": len(self.orders)}] + products
+        with open(self.imported_path, 'ab') as f:
+            f.write(b"".join(
+                (json.dumps(line, separators=(",", ":")) + "\n").encode("utf-8") for line in lines
+            ))
+
+    def _restore_stock(self, stock_since):
+        """Take everything sold before this start off the catalog stock levels"""
+        sold = {}
+        for position, order in enumerate(self.orders):
+            if order.failed:
+                continue
+            for product_id, quantity, _ in order.lines():
+                if position >= stock_since.get(product_id, 0):
+                    sold[product_id] = sold.get(product_id, 0) + quantity
+        for product_id, quantity in sold.items():
+            self.inventory.remove_sold(product_id, quantity)
+
+    def import_products(self, source, on_progress=None):
+        """Import a supplier feed and save it so it is reloaded on the next start"""
+        return import_products(source, self.catalog, on_progress=on_progress, on_products=self._save_imported)
+
+    # Users
+    @instrumented("shop.register_user")
+    def register_user(self, username, email, password):
+        if self.users.add(username, email, password) is None:
+            return False, "Username already exists"
+        return True, "Registration successful"
+
+    @instrumented("shop.login_user")
+    def login_user(self, username, password):
+        user = self.users.get(username)
+        if user is not None and user['password'] == password:
+            return True, user
+        return False, "Invalid credentials"
+
+    # Catalog
+    @instrumented("shop.find_products")
+    def find_products(self, query, category, min_price, max_price, min_rating, start=0, limit=None):
+        """Return (number of matches, ids of the matches from start on, at most limit of them).
+
+        Only the count and the requested window are cached, so an entry
+        stays small however many products match.
+        """
+        key = (query, category, min_price, max_price, min_rating, start, limit)
+        return self.cache.get_or_compute("products", key, lambda: self._find_products(*key))
+
+    @instrumented("shop.filter_products")
+    def _find_products(self, query, category, min_price, max_price, min_rating, start, limit):
+        if query.strip():
+            filters = self.catalog.active_filters(category, min_price, max_price, min_rating)
+            predicate = None
+            if any(value is not None for value in filters):
+                predicate = lambda product_id: product_matches(self.catalog.get(product_id), *filters)
+            count, ids = self.search_index.search_page(query, start, limit, predicate)
+            return count, tuple(ids)
+        ids = self.catalog.filter_ids(
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            min_rating=min_rating
+        )
+        end = None if limit is None else start + limit
+        return len(ids), tuple(ids[start:end])
+
+    # Orders
+    @instrumented("shop.create_order")
+    def create_order(self, user, cart, shipping_address):
+        """Reserve stock and hand the order to the pipeline; return it as Pending.
+
+        Raises OutOfStockError before anything is queued.
+        """
+        order = Order.from_cart(user['username'], cart, shipping_address)
+        reservation = self.inventory.reserve((product_id, quantity) for product_id, quantity, _ in order.lines())
+        self.pipeline.submit(order, reservation)
+        return order
+
+    def order_status(self, order_id):
+        return self.pipeline.status(order_id)
+
+    def close(self):
+        """Finish queued orders and stop the pipeline worker"""
+        self.pipeline.close()
+
+    def user_orders_page(self, username, page, per_page):
+        """One page of a user's orders, newest first.
+
+        The key includes the user's order count, so a new order moves the
+        user to fresh entries and nothing has to be invalidated.
+        """
+        key = (username, self.orders.user_order_count(username), page, per_page)
+        return self.cache.get_or_compute(
+            "orders", key,
+            lambda: list(self.orders.user_orders(username, start=(page - 1) * per_page, limit=per_page))
+        )
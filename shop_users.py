@@ -0,0 +1,121 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+from app_metrics import instrumented
+from shop_cache import SharedCache
+
+USER_COLUMNS = ("username", "email", "password", "created_at", "is_admin")
+
+
+class UserStore:
+    """SQLite-backed user table fronted by a SharedCache.
+
+    Lookups go through the primary key index, and inserts rely on the same
+    key to reject duplicate usernames atomically, so concurrent
+    registrations cannot overwrite each other. Registering never makes a
+    user an admin; only set_admin() does, for an account that exists.
+    """
+
+    def __init__(self, path="users.db", legacy_json="users.json", cache=None, cache_ttl=600):
+        self.path = path
+        # The TTL bounds staleness when another process writes the database
+        self.cache = cache if cache is not None else SharedCache(10000)
+        self.cache_ttl = cache_ttl
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                "username TEXT PRIMARY KEY, email TEXT, password TEXT, created_at TEXT, "
+                "is_admin INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+            if "is_admin" not in columns:
+                conn.execute("ALTER TABLE users ADD COLUMN is_admin INTEGER NOT NULL DEFAULT 0")
+        if legacy_json and os.path.exists(legacy_json) and len(self) == 0:
+            self._import_json(legacy_json)
+
+    def _connect(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _import_json(self, legacy_json):
+        """Copy users from the old users.json file, keeping existing rows"""
+        try:
+            with open(legacy_json, 'r') as f:
+                users = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Admin rights are never taken from the old file
+        rows = [tuple(user.get(column) for column in USER_COLUMNS[:-1]) + (0,) for user in users]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR IGNORE INTO users VALUES (?, ?, ?, ?, ?)", rows)
+
+    @instrumented("shop.load_user")
+    def get(self, username):
+        """Return the user dict for username, or None"""
+        user = self.cache.get("users", username)
+        if user is not None:
+            return user
+        row = self._connect().execute(
+            "SELECT username, email, password, created_at, is_admin FROM users WHERE username = ?",
+            (username,)
+        ).fetchone()
+        if row is None:
+            return None
+        user = dict(zip(USER_COLUMNS, row))
+        user['is_admin'] = bool(user['is_admin'])
+        self.cache.set("users", username, user, self.cache_ttl)
+        return user
+
+    def add(self, username, email, password):
+        """Insert a new user; return None if the username is already taken"""
+        user = {
+            "username": username,
+            "email": email,
+            "password": password,  # In real app, hash the password
+            "created_at": datetime.now().isoformat(),
+            "is_admin": False
+        }
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO users VALUES (?, ?, ?, ?, ?)",
+                    tuple(user[column] for column in USER_COLUMNS)
+                )
+        except sqlite3.IntegrityError:
+            return None
+        self.cache.set("users", username, user, self.cache_ttl)
+        return user
+
+    def set_admin(self, username, is_admin=True):
+        """Grant or revoke import rights; return False if there is no such user"""
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE users SET is_admin = ? WHERE username = ?", (int(is_admin), username)
+            ).rowcount
+        self.cache.invalidate("users", username)
+        return bool(updated)
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grant or revoke a registered user's product import rights.")
+    parser.add_argument("username")
+    parser.add_argument("--revoke", action="store_true", help="take the rights away instead")
+    parser.add_argument("--db", default="users.db", help="user database of the shop")
+    args = parser.parse_args()
+    if not UserStore(args.db, legacy_json=None).set_admin(args.username, not args.revoke):
+        sys.exit(f"No registered user named {args.username!r}")